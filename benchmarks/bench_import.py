@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for scripts/update_readme.py
+
+Imports the module in fresh interpreters with `python -X importtime` and
+reports the best cumulative time, the slowest nested imports, and whether
+any heavy dependency was pulled in eagerly. Exits non-zero when the import
+exceeds --max-ms or imports PyGithub, requests or PyYAML, so it can guard
+against regressions in CI.
+
+Usage: python benchmarks/bench_import.py [--runs N] [--max-ms MS]
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts")
+
+# Dependencies that must only be imported when a client is actually needed
+HEAVY_MODULES = ["github", "requests", "urllib3", "yaml"]
+
+# "import time:  self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def run_importtime():
+    """Import update_readme once; return its cumulative time and its nested imports"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import update_readme"],
+        cwd=SCRIPTS_DIR,
+        env=dict(os.environ, GITHUB_TOKEN="benchmark"),
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    lines = [
+        (match.group(4), int(match.group(2)), len(match.group(3)))
+        for match in map(IMPORTTIME_LINE.match, result.stderr.splitlines())
+        if match
+    ]
+
+    # Children are printed before their parent, indented deeper
+    end = next(i for i, line in enumerate(lines) if line[0] == "update_readme")
+    total, depth = lines[end][1], lines[end][2]
+    nested = {}
+    for module, cumulative, indent in reversed(lines[:end]):
+        if indent <= depth:
+            break
+        nested[module] = cumulative
+    return total, nested
+
+def eagerly_imported():
+    """List heavy modules present in sys.modules right after the import"""
+    check = f"import sys, update_readme; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", check],
+        cwd=SCRIPTS_DIR,
+        env=dict(os.environ, GITHUB_TOKEN="benchmark"),
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return result.stdout.split()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to start")
+    parser.add_argument("--max-ms", type=float, default=100.0, help="fail above this cumulative import time")
+    args = parser.parse_args()
+
+    runs = [run_importtime() for _ in range(args.runs)]
+    total, nested = min(runs, key=lambda run: run[0])
+    total_ms = total / 1000
+
+    print(f"update_readme import: {total_ms:.1f} ms (best of {args.runs})")
+    print("Slowest nested imports:")
+    for module, us in sorted(nested.items(), key=lambda item: item[1], reverse=True)[:8]:
+        print(f"  {us / 1000:8.1f} ms  {module}")
+
+    heavy = eagerly_imported()
+    if heavy:
+        print(f"FAIL: imported eagerly: {', '.join(heavy)}")
+    if total_ms > args.max_ms:
+        print(f"FAIL: import took {total_ms:.1f} ms, budget is {args.max_ms:.0f} ms")
+    sys.exit(1 if heavy or total_ms > args.max_ms else 0)
+
+if __name__ == "__main__":
+    main()
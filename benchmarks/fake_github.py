@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Synthetic GitHub REST/GraphQL stand-in server
+
+Serves deterministic fake accounts with any number of repositories so the
+generator can be exercised offline: user and repository listings (with
+Link pagination), languages, topics, READMEs of varying size (as base64
+JSON or raw with Range support), git trees and blobs with a few manifests,
+and the GraphQL repositories query. Responses carry ETags and rate limit headers
+like the real API. Latency and injected faults (secondary rate limit 403,
+429, 502) are configurable.
+
+Usage: python benchmarks/fake_github.py --accounts bench10=10,bench1000=1000 [--port 8000]
+Then point the generator at it with GITHUB_API_URL=http://127.0.0.1:8000.
+"""
+import re
+import json
+import time
+import base64
+import random
+import hashlib
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+LANGUAGES = ["Python", "JavaScript", "TypeScript", "HTML", "CSS", "Go", "Rust", "Java", "Shell", "C++"]
+TOPICS = ["api", "cli", "web-app", "automation", "data-analysis", "docker", "machine-learning", "bot", "game", "iot"]
+DESCRIPTIONS = [
+    "A small web app", "Command line tool", "Data analysis notebooks", "REST API service",
+    "Automation scripts", "Mobile client", "Game prototype", None
+]
+KEYWORDS = [
+    "react", "django", "flask", "docker", "kubernetes", "aws", "postgresql", "redis",
+    "machine learning", "android", "github actions", "terraform", "express", "tutorial"
+]
+FILLER = (
+    "This project is maintained as part of a larger effort to keep things simple. "
+    "Install the dependencies, copy the example configuration and run the tests. "
+    "Contributions are welcome; please open an issue before sending a pull request. "
+)
+# Manifests a repository tree may contain: path -> content options
+MANIFESTS = {
+    "package.json": [
+        '{"name": "app", "dependencies": {"react": "^18.2.0", "express": "^4.18.0"}}',
+        '{"name": "app", "dependencies": {"vue": "^3.4.0"}, "devDependencies": {"eslint": "^8.0.0"}}',
+    ],
+    "requirements.txt": ["django>=4.2\npsycopg2-binary==2.9.9\n", "flask==3.0.0\nredis>=5\n"],
+    "pyproject.toml": ['[project]\nname = "tool"\ndependencies = ["flask>=3", "boto3"]\n'],
+    "Dockerfile": ["FROM python:3.12-slim\nCOPY . /app\n"],
+    "docker-compose.yml": ["services:\n  db:\n    image: postgres:16\n  cache:\n    image: redis:7\n"],
+    ".github/workflows/ci.yml": ["on: push\njobs: {}\n"],
+    "infra/main.tf": ['provider "aws" {}\n'],
+}
+# README sizes in bytes; each repository picks one
+README_SIZES = [512, 4 * 1024, 32 * 1024, 256 * 1024]
+# Faults injected when --fault-rate is set
+FAULTS = [
+    (403, {"Retry-After": "1"}, {"message": "You have exceeded a secondary rate limit."}),
+    (429, {"Retry-After": "1"}, {"message": "Too many requests"}),
+    (502, {}, {"message": "Server Error"}),
+]
+RATE_LIMIT = 5000
+ISO_EPOCH = 1704067200  # 2024-01-01T00:00:00Z
+
+def iso(timestamp):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+class FakeGitHub:
+    """In-process fake GitHub API with request and byte counters"""
+
+    def __init__(self, accounts, latency=0.0, fault_rate=0.0, rate_limit=RATE_LIMIT, seed=0):
+        # login -> number of repositories
+        self.accounts = dict(accounts)
+        self.latency = latency
+        self.fault_rate = fault_rate
+        self.rate_limit = rate_limit
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.reset_at = int(time.time()) + 3600
+        self.remaining = rate_limit
+        self.server = None
+        # blob sha -> content, filled as trees are served
+        self.blobs = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zero the request counters"""
+        with self.lock:
+            self.stats = {
+                "requests": 0, "not_modified": 0, "faults": 0,
+                "bytes_sent": 0, "bytes_received": 0, "endpoints": {}
+            }
+
+    def start(self, host="127.0.0.1", port=0):
+        """Serve in a background thread and return the base URL"""
+        # A subclass per server so several fakes can run side by side
+        Handler = type("Handler", (FakeGitHubHandler,), {"fake": self})
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self.server.server_port}"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    # Synthetic data
+
+    def _rng(self, login, index):
+        return random.Random(f"{self.seed}/{login}/{index}")
+
+    def repo_name(self, index):
+        return f"repo-{index:05d}"
+
+    def repo_index(self, name):
+        match = re.fullmatch(r"repo-(\d+)", name)
+        return int(match.group(1)) if match else None
+
+    def repo(self, base_url, login, index):
+        """REST representation of a repository"""
+        rng = self._rng(login, index)
+        name = self.repo_name(index)
+        pushed = ISO_EPOCH + index * 3600
+        return {
+            "id": index + 1,
+            "node_id": f"R_{login}_{index}",
+            "name": name,
+            "full_name": f"{login}/{name}",
+            "private": False,
+            "fork": index % 10 == 9,
+            "description": rng.choice(DESCRIPTIONS),
+            "stargazers_count": rng.randint(0, 50),
+            "watchers_count": 0,
+            "forks_count": rng.randint(0, 10),
+            "pushed_at": iso(pushed),
+            "updated_at": iso(pushed + 60),
+            "created_at": iso(ISO_EPOCH),
+            "default_branch": "main",
+            "url": f"{base_url}/repos/{login}/{name}",
+            "html_url": f"https://github.com/{login}/{name}",
+            "owner": {"login": login, "id": 1, "type": "User"},
+        }
+
+    def languages(self, login, index):
+        rng = self._rng(login, index)
+        rng.random()
+        chosen = rng.sample(LANGUAGES, rng.randint(1, 4))
+        return {lang: rng.randint(1000, 200000) for lang in chosen}
+
+    def topics(self, login, index):
+        rng = self._rng(login, index)
+        return sorted(rng.sample(TOPICS, rng.randint(0, 3)))
+
+    def readme(self, login, index):
+        """README text; size varies per repository"""
+        rng = self._rng(login, index)
+        size = rng.choice(README_SIZES)
+        header = f"# {self.repo_name(index)}\n\nBuilt with {', '.join(rng.sample(KEYWORDS, 3))}.\n\n"
+        body = FILLER * (size // len(FILLER) + 1)
+        return (header + body)[:size]
+
+    def tree(self, login, index):
+        """Recursive git tree of a repository's default branch"""
+        rng = random.Random(f"{self.seed}/{login}/{index}/tree")
+        files = {"README.md": self.readme(login, index), "src/main.py": "print('hello')\n"}
+        for path in rng.sample(sorted(MANIFESTS), rng.randint(0, 4)):
+            files[path] = rng.choice(MANIFESTS[path])
+
+        entries = []
+        for path, content in sorted(files.items()):
+            data = content.encode("utf-8")
+            sha = hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+            with self.lock:
+                self.blobs[sha] = data
+            entries.append({"path": path, "mode": "100644", "type": "blob", "sha": sha, "size": len(data)})
+        tree_sha = hashlib.sha1(json.dumps(entries).encode("utf-8")).hexdigest()
+        return {"sha": tree_sha, "tree": entries, "truncated": False}
+
+    def user(self, login):
+        return {
+            "login": login, "id": 1, "type": "User",
+            "public_repos": self.accounts[login], "followers": 42, "following": 7,
+            "created_at": iso(ISO_EPOCH),
+        }
+
+    def graphql_repositories(self, login, first, cursor):
+        """Page of the repositories connection used by the GraphQL backend"""
+        total = self.accounts[login]
+        start = int(cursor) if cursor else 0
+        end = min(start + first, total)
+        nodes = []
+        for index in range(start, end):
+            repo = self.repo("", login, index)
+            nodes.append({
+                "databaseId": repo["id"],
+                "name": repo["name"],
+                "description": repo["description"],
+                "isFork": repo["fork"],
+                "pushedAt": repo["pushed_at"],
+                "updatedAt": repo["updated_at"],
+                "stargazerCount": repo["stargazers_count"],
+                "forkCount": repo["forks_count"],
+                "repositoryTopics": {"nodes": [{"topic": {"name": t}} for t in self.topics(login, index)]},
+                "languages": {"edges": [
+                    {"size": size, "node": {"name": lang}}
+                    for lang, size in self.languages(login, index).items()
+                ]},
+                "defaultBranchRef": {"name": "main", "target": {"tree": {"oid": self.tree(login, index)["sha"]}}},
+                "readme0": {"text": self.readme(login, index)},
+            })
+        return {
+            "pageInfo": {"hasNextPage": end < total, "endCursor": str(end)},
+            "nodes": nodes,
+        }
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fake = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _count(self, endpoint, status, sent, received):
+        fake = self.fake
+        with fake.lock:
+            fake.stats["requests"] += 1
+            fake.stats["bytes_sent"] += sent
+            fake.stats["bytes_received"] += received
+            fake.stats["endpoints"][endpoint] = fake.stats["endpoints"].get(endpoint, 0) + 1
+            if status == 304:
+                fake.stats["not_modified"] += 1
+            elif status < 400 and fake.remaining > 0:
+                fake.remaining -= 1
+            return fake.remaining
+
+    def _send(self, endpoint, status, body, received=0, headers=None, content_type="application/json"):
+        if isinstance(body, (dict, list)):
+            payload = json.dumps(body).encode("utf-8")
+        elif isinstance(body, str):
+            payload = body.encode("utf-8")
+        else:
+            payload = body or b""
+
+        etag = f'"{hashlib.md5(payload).hexdigest()}"'
+        if status == 200 and self.command == "GET" and self.headers.get("If-None-Match") == etag:
+            status, payload = 304, b""
+
+        remaining = self._count(endpoint, status, len(payload), received)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("X-RateLimit-Limit", str(self.fake.rate_limit))
+        self.send_header("X-RateLimit-Remaining", str(remaining))
+        self.send_header("X-RateLimit-Reset", str(self.fake.reset_at))
+        self.send_header("X-RateLimit-Resource", "graphql" if endpoint == "graphql" else "core")
+        if status in (200, 304):
+            self.send_header("ETag", etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_raw(self, endpoint, content):
+        """Serve raw file content, honoring a single "bytes=start-end" Range"""
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match is None:
+            self._send(endpoint, 200, content, content_type="application/vnd.github.raw")
+            return
+        start = int(match.group(1))
+        end = min(int(match.group(2)) if match.group(2) else len(content) - 1, len(content) - 1)
+        if start > end:
+            self._send(endpoint, 416, b"", headers={"Content-Range": f"bytes */{len(content)}"})
+            return
+        self._send(
+            endpoint, 206, content[start:end + 1], content_type="application/vnd.github.raw",
+            headers={"Content-Range": f"bytes {start}-{end}/{len(content)}"}
+        )
+
+    def _maybe_fault(self, endpoint, received=0):
+        fake = self.fake
+        with fake.lock:
+            inject = fake.fault_rate and fake.rng.random() < fake.fault_rate
+            if inject:
+                fake.stats["faults"] += 1
+                status, headers, body = fake.rng.choice(FAULTS)
+        if inject:
+            self._send(endpoint, status, body, received, headers)
+        return inject
+
+    def do_GET(self):
+        fake = self.fake
+        if fake.latency:
+            time.sleep(fake.latency)
+
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        parts = [p for p in parsed.path.split("/") if p]
+        base_url = f"http://{self.headers.get('Host')}"
+
+        if len(parts) >= 2 and parts[0] == "users" and parts[1] in fake.accounts:
+            login = parts[1]
+            if len(parts) == 2:
+                endpoint = "users"
+                if not self._maybe_fault(endpoint):
+                    self._send(endpoint, 200, fake.user(login))
+                return
+            if parts[2:] == ["repos"]:
+                endpoint = "users/repos"
+                if self._maybe_fault(endpoint):
+                    return
+                per_page = int(query.get("per_page", ["30"])[0])
+                page = int(query.get("page", ["1"])[0])
+                total = fake.accounts[login]
+                start = (page - 1) * per_page
+                items = [fake.repo(base_url, login, i) for i in range(start, min(start + per_page, total))]
+                last = max(1, -(-total // per_page))
+                links = []
+                if page < last:
+                    links.append(f'<{base_url}/users/{login}/repos?per_page={per_page}&page={page + 1}>; rel="next"')
+                    links.append(f'<{base_url}/users/{login}/repos?per_page={per_page}&page={last}>; rel="last"')
+                self._send(endpoint, 200, items, headers={"Link": ", ".join(links)} if links else None)
+                return
+
+        if len(parts) >= 3 and parts[0] == "repos" and parts[1] in fake.accounts:
+            login = parts[1]
+            index = fake.repo_index(parts[2])
+            if index is not None and index < fake.accounts[login]:
+                rest = parts[3:]
+                endpoint = "repos/" + "/".join(rest[:2] if rest[:1] == ["git"] else rest[:1]) if rest else "repos"
+                if self._maybe_fault(endpoint):
+                    return
+                if not rest:
+                    self._send(endpoint, 200, fake.repo(base_url, login, index))
+                elif rest == ["languages"]:
+                    self._send(endpoint, 200, fake.languages(login, index))
+                elif rest == ["topics"]:
+                    self._send(endpoint, 200, {"names": fake.topics(login, index)})
+                elif rest[:2] == ["git", "trees"] and len(rest) == 3:
+                    tree = fake.tree(login, index)
+                    if rest[2] in ("main", tree["sha"]):
+                        self._send(endpoint, 200, tree)
+                    else:
+                        self._send(endpoint, 404, {"message": "Not Found"})
+                elif rest[:2] == ["git", "blobs"] and len(rest) == 3 and rest[2] in fake.blobs:
+                    content = fake.blobs[rest[2]]
+                    if "raw" in self.headers.get("Accept", ""):
+                        self._send(endpoint, 200, content, content_type="application/vnd.github.raw")
+                    else:
+                        self._send(endpoint, 200, {
+                            "sha": rest[2], "size": len(content), "encoding": "base64",
+                            "content": base64.b64encode(content).decode("ascii"),
+                        })
+                elif rest == ["readme"] and "raw" in self.headers.get("Accept", ""):
+                    self._send_raw(endpoint, fake.readme(login, index).encode("utf-8"))
+                elif rest == ["readme"]:
+                    content = fake.readme(login, index).encode("utf-8")
+                    self._send(endpoint, 200, {
+                        "type": "file", "name": "README.md", "path": "README.md",
+                        "encoding": "base64", "size": len(content),
+                        "content": base64.b64encode(content).decode("ascii"),
+                    })
+                else:
+                    self._send(endpoint, 404, {"message": "Not Found"})
+                return
+
+        self._send("other", 404, {"message": "Not Found"})
+
+    def do_POST(self):
+        fake = self.fake
+        if fake.latency:
+            time.sleep(fake.latency)
+
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length)
+        if urlparse(self.path).path.rstrip("/") != "/graphql":
+            self._send("other", 404, {"message": "Not Found"}, received=length)
+            return
+        if self._maybe_fault("graphql", received=length):
+            return
+
+        variables = json.loads(raw).get("variables", {})
+        login = variables.get("login")
+        if login not in fake.accounts:
+            self._send("graphql", 200, {"data": {"user": None}, "errors": [{"message": "Could not resolve to a User"}]}, received=length)
+            return
+        page = fake.graphql_repositories(login, variables.get("first", 100), variables.get("cursor"))
+        self._send("graphql", 200, {"data": {"user": {"repositories": page}}}, received=length)
+
+def parse_accounts(value):
+    """Parse "login=count,login=count" into a dict"""
+    accounts = {}
+    for item in value.split(","):
+        login, _, count = item.partition("=")
+        accounts[login.strip()] = int(count)
+    return accounts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", default="bench10=10,bench1000=1000,bench10000=10000", help="login=repo_count list")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every response")
+    parser.add_argument("--fault-rate", type=float, default=0.0, help="fraction of requests answered with 403/429/502")
+    parser.add_argument("--rate-limit", type=int, default=RATE_LIMIT, help="requests per rate limit window")
+    args = parser.parse_args()
+
+    fake = FakeGitHub(parse_accounts(args.accounts), args.latency_ms / 1000, args.fault_rate, args.rate_limit)
+    print(f"Fake GitHub API listening on {fake.start(port=args.port)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite against the synthetic GitHub server
+
+Starts benchmarks/fake_github.py in-process with accounts of 10, 1,000 and
+10,000 repositories, then runs analyze_repositories(),
+get_contribution_stats() and generate_readme() for each account in a fresh
+interpreter. Every run records wall time per phase, request count, bytes
+transferred and peak RSS. Runs start with an empty state directory
+("cold"); with --warm they are repeated on the same state to measure the
+caches.
+
+The report is JSON so two versions can be compared:
+
+    python benchmarks/run_benchmarks.py --output before.json
+    python benchmarks/run_benchmarks.py --output after.json --compare before.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BENCHMARKS_DIR, "..", "scripts")
+REPORT_VERSION = 1
+
+def run_child(username, result_path):
+    """Run the pipeline for one account and write timings to result_path"""
+    import resource
+
+    sys.path.insert(0, SCRIPTS_DIR)
+    phases = {}
+
+    start = time.perf_counter()
+    import update_readme
+    phases["import"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analysis = update_readme.analyze_repositories(username)
+    phases["analyze_repositories"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stats = update_readme.get_contribution_stats(username)
+    phases["get_contribution_stats"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    readme = update_readme.generate_readme(analysis, stats, username)
+    phases["generate_readme"] = time.perf_counter() - start
+
+    update_readme.get_context().finish()
+
+    with open(result_path, "w") as f:
+        json.dump({
+            "phases": phases,
+            # ru_maxrss is in kilobytes on Linux
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "total_repos": analysis["stats"]["total_repos"],
+            "readme_bytes": len(readme.encode("utf-8")),
+        }, f)
+
+def run_case(fake, base_url, username, backend, state_dir, label, verbose):
+    """Run one benchmark case in a subprocess and combine it with server counters"""
+    result_path = os.path.join(state_dir, "result.json")
+    env = dict(
+        os.environ,
+        GITHUB_API_URL=base_url,
+        GITHUB_GRAPHQL_URL=f"{base_url}/graphql",
+        GITHUB_TOKEN="benchmark",
+        DATA_BACKEND=backend,
+        STATE_DIR=state_dir,
+    )
+    fake.reset_stats()
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", username, result_path],
+        env=env,
+        stdout=None if verbose else subprocess.DEVNULL,
+        check=True
+    )
+    wall = time.perf_counter() - start
+
+    with open(result_path, "r") as f:
+        result = json.load(f)
+    with fake.lock:
+        server = dict(fake.stats)
+    return {
+        "account": username,
+        "repos": fake.accounts[username],
+        "backend": backend,
+        "run": label,
+        "wall_seconds": round(wall, 4),
+        "phases": {name: round(seconds, 4) for name, seconds in result["phases"].items()},
+        "requests": server["requests"],
+        "not_modified": server["not_modified"],
+        "faults": server["faults"],
+        "bytes_sent": server["bytes_sent"],
+        "bytes_received": server["bytes_received"],
+        "endpoints": server["endpoints"],
+        "peak_rss_mb": round(result["peak_rss_mb"], 1),
+        "total_repos": result["total_repos"],
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARKS_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(report, baseline):
+    """Print how each case moved relative to a baseline report"""
+    previous = {(r["account"], r["backend"], r["run"]): r for r in baseline["results"]}
+    print(f"\nCompared with {baseline.get('revision') or 'baseline'}:")
+    for result in report["results"]:
+        old = previous.get((result["account"], result["backend"], result["run"]))
+        if old is None:
+            continue
+        changes = []
+        for key in ("wall_seconds", "requests", "bytes_sent", "peak_rss_mb"):
+            if old[key]:
+                changes.append(f"{key} {(result[key] - old[key]) / old[key] * 100:+.0f}%")
+        print(f"  {result['account']:>12} {result['backend']:>8} {result['run']:>5}: {', '.join(changes)}")
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], sys.argv[3])
+        return
+
+    sys.path.insert(0, BENCHMARKS_DIR)
+    from fake_github import FakeGitHub
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,1000,10000", help="comma-separated repository counts")
+    parser.add_argument("--backends", default="rest", help="comma-separated data backends (rest, graphql)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="server latency per request")
+    parser.add_argument("--fault-rate", type=float, default=0.0, help="fraction of requests answered with 403/429/502")
+    parser.add_argument("--warm", action="store_true", help="repeat each case on the same state to measure caching")
+    parser.add_argument("--output", default="bench_output.json", help="where to write the JSON report")
+    parser.add_argument("--compare", help="baseline report to compare against")
+    parser.add_argument("--verbose", action="store_true", help="show the generator's output")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    backends = [backend.strip() for backend in args.backends.split(",")]
+    accounts = {f"bench{size}": size for size in sizes}
+
+    # A budget large enough that the scheduler never throttles the benchmark
+    fake = FakeGitHub(accounts, args.latency_ms / 1000, args.fault_rate, rate_limit=10_000_000)
+    base_url = fake.start()
+
+    results = []
+    try:
+        for username in accounts:
+            for backend in backends:
+                state_dir = tempfile.mkdtemp(prefix=f"bench-{username}-{backend}-")
+                try:
+                    for label in (["cold", "warm"] if args.warm else ["cold"]):
+                        result = run_case(fake, base_url, username, backend, state_dir, label, args.verbose)
+                        results.append(result)
+                        print(
+                            f"{username:>12} {backend:>8} {label:>5}: {result['wall_seconds']:8.2f}s "
+                            f"{result['requests']:>6} requests {result['bytes_sent'] / 1e6:8.1f} MB "
+                            f"{result['peak_rss_mb']:7.1f} MB RSS"
+                        )
+                finally:
+                    shutil.rmtree(state_dir, ignore_errors=True)
+    finally:
+        fake.stop()
+
+    report = {
+        "version": REPORT_VERSION,
+        "revision": git_revision(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "sizes": sizes, "backends": backends, "latency_ms": args.latency_ms,
+            "fault_rate": args.fault_rate, "warm": args.warm,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Local history of profile numbers
+
+Every fetch appends one run to a SQLite database: repository, star, fork
+and follower totals plus the bytes of each displayed language and the
+count of each displayed category. Runs are indexed by user and time so
+trends (e.g. week over week) are read from the database alone, without
+API calls. Old runs are downsampled: recent ones are all kept, older ones
+thinned to one per day and then one per ISO week, and runs past the
+retention period are dropped.
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+# Bump (and migrate in _connect) when the tables change
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    total_repos INTEGER NOT NULL,
+    total_stars INTEGER NOT NULL,
+    total_forks INTEGER NOT NULL,
+    followers INTEGER NOT NULL,
+    partial INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_by_user_time ON runs (username, recorded_at);
+CREATE TABLE IF NOT EXISTS languages (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    language TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    PRIMARY KEY (run_id, language)
+);
+CREATE TABLE IF NOT EXISTS categories (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (run_id, category)
+);
+"""
+
+# Timestamps are stored as UTC text, which sorts chronologically
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Runs younger than this many days are all kept
+KEEP_ALL_DAYS = 14
+
+# Up to this age one run per day is kept, beyond it one per ISO week
+KEEP_DAILY_DAYS = 180
+
+# A baseline may be this much younger than its period, so a daily job that
+# starts a little later than last week's still compares against it
+BASELINE_SLACK = timedelta(hours=12)
+
+TOTALS = ["total_repos", "total_stars", "total_forks", "followers"]
+
+def parse_time(value):
+    """Parse a stored timestamp; None means now"""
+    if value is None:
+        return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    return datetime.strptime(value, TIME_FORMAT)
+
+def run_values(analysis, stats):
+    """Extract the numbers a run records from the analysis and user stats"""
+    return {
+        "total_repos": analysis["stats"]["total_repos"],
+        "total_stars": analysis["stats"]["total_stars"],
+        "total_forks": analysis["stats"]["total_forks"],
+        "followers": stats["followers"],
+        "languages": dict(analysis["languages"]),
+        "categories": dict(analysis.get("project_categories", {})),
+        "partial": bool(analysis.get("partial")),
+    }
+
+class HistoryStore:
+    """Append-only run history in a SQLite file, shared by all users of a batch"""
+
+    def __init__(self, path, retention_days=0):
+        self.path = path
+        # 0 keeps runs forever
+        self.retention_days = retention_days
+        self.lock = threading.Lock()
+        self.connection = None
+
+    def _connect(self):
+        """Open the database on first use and create the tables"""
+        if self.connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA foreign_keys = ON")
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, SCHEMA_VERSION):
+                connection.close()
+                raise RuntimeError(f"{self.path}: unsupported history schema version {version}")
+            with connection:
+                connection.executescript(SCHEMA)
+                connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.connection = connection
+        return self.connection
+
+    def record(self, username, analysis, stats, recorded_at=None):
+        """Append one run and downsample the user's older runs"""
+        values = run_values(analysis, stats)
+        now = parse_time(recorded_at)
+        with self.lock:
+            connection = self._connect()
+            with connection:
+                cursor = connection.execute(
+                    "INSERT INTO runs (username, recorded_at, total_repos, total_stars, total_forks, followers, partial) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [username, now.strftime(TIME_FORMAT)] + [values[name] for name in TOTALS] + [int(values["partial"])]
+                )
+                run_id = cursor.lastrowid
+                connection.executemany(
+                    "INSERT INTO languages (run_id, language, bytes) VALUES (?, ?, ?)",
+                    [(run_id, language, count) for language, count in values["languages"].items()]
+                )
+                connection.executemany(
+                    "INSERT INTO categories (run_id, category, count) VALUES (?, ?, ?)",
+                    [(run_id, category, count) for category, count in values["categories"].items()]
+                )
+                self._compact(connection, username, now)
+
+    def _compact(self, connection, username, now):
+        """Thin out old runs: the last run of each day, then of each ISO week"""
+        keep_all = (now - timedelta(days=KEEP_ALL_DAYS)).strftime(TIME_FORMAT)
+        if self.retention_days:
+            cutoff = (now - timedelta(days=self.retention_days)).strftime(TIME_FORMAT)
+            connection.execute("DELETE FROM runs WHERE username = ? AND recorded_at < ?", (username, cutoff))
+
+        keep_daily = now - timedelta(days=KEEP_DAILY_DAYS)
+        rows = connection.execute(
+            "SELECT id, recorded_at FROM runs WHERE username = ? AND recorded_at < ? ORDER BY recorded_at",
+            (username, keep_all)
+        ).fetchall()
+        # Rows are oldest first, so the last run seen for a period wins
+        kept = {}
+        for run_id, recorded_at in rows:
+            when = parse_time(recorded_at)
+            period = when.isocalendar()[:2] if when < keep_daily else when.date()
+            kept[period] = run_id
+        kept = set(kept.values())
+        removed = [(run_id,) for run_id, recorded_at in rows if run_id not in kept]
+        connection.executemany("DELETE FROM runs WHERE id = ?", removed)
+
+    def baseline(self, username, before):
+        """Get the values of the latest complete run recorded at or before a time, or None"""
+        # Reading never creates the database
+        if self.connection is None and not os.path.exists(self.path):
+            return None
+        with self.lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT id, recorded_at, total_repos, total_stars, total_forks, followers FROM runs "
+                "WHERE username = ? AND recorded_at <= ? AND partial = 0 "
+                "ORDER BY recorded_at DESC LIMIT 1",
+                (username, before.strftime(TIME_FORMAT))
+            ).fetchone()
+            if row is None:
+                return None
+            run_id = row[0]
+            values = dict(zip(["recorded_at"] + TOTALS, row[1:]))
+            values["languages"] = dict(connection.execute(
+                "SELECT language, bytes FROM languages WHERE run_id = ?", (run_id,)
+            ).fetchall())
+            values["categories"] = dict(connection.execute(
+                "SELECT category, count FROM categories WHERE run_id = ?", (run_id,)
+            ).fetchall())
+        return values
+
+    def trends(self, username, analysis, stats, periods, as_of=None):
+        """Compare the given numbers with the runs one period earlier
+
+        periods maps a label to a number of days. Returns the current
+        values and, per label, the baseline run's values (None when the
+        history does not reach back that far).
+        """
+        as_of = parse_time(as_of)
+        return {
+            "current": run_values(analysis, stats),
+            "baselines": {
+                label: self.baseline(username, as_of - timedelta(days=days) + BASELINE_SLACK)
+                for label, days in periods.items()
+            },
+        }
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
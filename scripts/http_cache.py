@@ -0,0 +1,210 @@
+"""
+Persistent conditional-request HTTP cache
+
+Stores response bodies on disk together with their ETag / Last-Modified
+validators and revalidates them with If-None-Match / If-Modified-Since.
+GitHub answers unchanged resources with 304 Not Modified, which does not
+count against the rate limit; the cached body is then served instead.
+"""
+import os
+import json
+import hashlib
+import threading
+import time
+from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Headers that describe the wire format rather than the decoded body we store
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+# Fraction of the size budget an over-full cache is evicted down to
+EVICT_TARGET = 0.9
+
+class HTTPCache:
+    """Size-bounded on-disk store of validated GET responses"""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, "index.json")
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self.dirty = False
+
+        # Index maps cache key -> validators, headers and bookkeeping
+        self.index = {}
+        try:
+            with open(self.index_path, "r") as f:
+                self.index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.index = {}
+        # Kept up to date on every change, so stores never re-sum the index
+        self.total_size = sum(entry["size"] for entry in self.index.values())
+
+    @staticmethod
+    def make_key(request):
+        """Build the cache key for a prepared request"""
+        # The same URL can be served as JSON or raw content
+        accept = request.headers.get("Accept", "")
+        return f"{request.method} {request.url} {accept}"
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    def validators(self, key):
+        """Get conditional request headers for a cached entry"""
+        with self.lock:
+            entry = self.index.get(key)
+            if entry is None:
+                return {}
+            headers = {}
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            return headers
+
+    def load(self, key, request, fresh_headers):
+        """Rebuild a 200 response from the cache after a 304 revalidation"""
+        with self.lock:
+            entry = self.index.get(key)
+            if entry is None:
+                return None
+            try:
+                with open(self._body_path(key), "rb") as f:
+                    content = f.read()
+            except OSError:
+                # Body went missing; forget the entry so it is refetched
+                self.total_size -= self.index.pop(key)["size"]
+                self.dirty = True
+                return None
+            entry["accessed"] = time.time()
+            self.stats["hits"] += 1
+            self.dirty = True
+
+        # Rate limit and date headers come from the fresh 304
+        headers = CaseInsensitiveDict(entry["headers"])
+        for name, value in fresh_headers.items():
+            if name.lower() not in DROPPED_HEADERS:
+                headers[name] = value
+
+        response = Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = headers
+        response._content = content
+        response.encoding = get_encoding_from_headers(headers)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def store(self, key, response):
+        """Save a 200 response if it carries validators"""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        with self.lock:
+            self.stats["misses"] += 1
+            if not etag and not last_modified:
+                return
+            content = response.content
+            if len(content) > self.max_bytes:
+                return
+
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._body_path(key), "wb") as f:
+                f.write(content)
+            previous = self.index.get(key)
+            if previous is not None:
+                self.total_size -= previous["size"]
+            self.total_size += len(content)
+            self.index[key] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "headers": {
+                    name: value for name, value in response.headers.items()
+                    if name.lower() not in DROPPED_HEADERS
+                },
+                "size": len(content),
+                "accessed": time.time()
+            }
+            self.stats["stores"] += 1
+            self.dirty = True
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries once the cache exceeds its budget
+
+        Evicts down to EVICT_TARGET of the budget, so a full cache sorts its
+        index once per batch of evictions rather than on every store.
+        """
+        if self.total_size <= self.max_bytes:
+            return
+        target = self.max_bytes * EVICT_TARGET
+        for key in sorted(self.index, key=lambda k: self.index[k]["accessed"]):
+            self.total_size -= self.index.pop(key)["size"]
+            try:
+                os.remove(self._body_path(key))
+            except OSError:
+                pass
+            self.stats["evictions"] += 1
+            if self.total_size <= target:
+                break
+
+    def save(self):
+        """Write the index to disk if anything changed"""
+        with self.lock:
+            if not self.dirty:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.index, f)
+            os.replace(tmp_path, self.index_path)
+            self.dirty = False
+
+    def summary(self):
+        """Get a one-line summary of cache effectiveness for this run"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = (self.stats["hits"] / lookups * 100) if lookups else 0
+        size_mb = self.total_size / (1024 * 1024)
+        return (
+            f"HTTP cache: {self.stats['hits']} hits, {self.stats['misses']} misses "
+            f"({hit_rate:.0f}% hit rate), {self.stats['stores']} stored, "
+            f"{self.stats['evictions']} evicted, {len(self.index)} entries ({size_mb:.1f} MB)"
+        )
+
+class CachingAdapter(HTTPAdapter):
+    """Transport adapter that revalidates GET requests against an HTTPCache"""
+
+    def __init__(self, cache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        # Streamed bodies are consumed by the caller, so they bypass the cache
+        if request.method != "GET" or kwargs.get("stream"):
+            return super().send(request, **kwargs)
+
+        key = self.cache.make_key(request)
+        request.headers.update(self.cache.validators(key))
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304:
+            # The 304 itself is discarded; drain it so its connection goes back
+            # to the pool instead of leaking (the pool blocks when exhausted)
+            response.content
+            response.close()
+            cached = self.cache.load(key, request, response.headers)
+            if cached is not None:
+                cached.connection = self
+                return cached
+            # Entry vanished between lookup and load; refetch unconditionally
+            request.headers.pop("If-None-Match", None)
+            request.headers.pop("If-Modified-Since", None)
+            response = super().send(request, **kwargs)
+
+        if response.status_code == 200:
+            self.cache.store(key, response)
+        return response
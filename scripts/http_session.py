@@ -0,0 +1,92 @@
+"""
+Shared pooled HTTP session for all GitHub traffic
+
+PyGithub, the GraphQL backend and the plain REST calls all send through one
+requests.Session, so they share keep-alive connections (fewer TLS
+handshakes), the conditional request cache and the rate limit scheduler.
+Every request gets explicit connect/read timeouts so a stalled socket
+cannot hang the run.
+"""
+import time
+import requests
+from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass, Requester
+from http_cache import CachingAdapter
+from rate_limit import RateLimitedAdapter
+
+class GitHubAdapter(CachingAdapter, RateLimitedAdapter):
+    """Cache revalidation layered over rate limit scheduling and retries"""
+
+    def __init__(self, timeout, metrics=None, **kwargs):
+        self.timeout = timeout
+        self.metrics = metrics
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        # requests has no session-wide timeout; apply ours when none is given
+        timeout = timeout or self.timeout
+        if self.metrics is None:
+            return super().send(request, timeout=timeout, **kwargs)
+
+        # Timed as the caller sees it: queueing, retries and revalidation included
+        start = time.perf_counter()
+        status = None
+        try:
+            response = super().send(request, timeout=timeout, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            self.metrics.record_request(request.method, request.url, status, start, time.perf_counter() - start)
+
+def create_session(cache, scheduler, pool_size, timeout, max_hosts=4, metrics=None):
+    """Build the shared session
+
+    pool_size caps connections per host (callers block for a free one rather
+    than opening extra sockets); max_hosts is how many host pools are kept.
+    Every request is recorded in metrics, if given.
+    """
+    session = requests.Session()
+    # Any non-None auth stops requests from falling back to ~/.netrc credentials
+    session.auth = Requester.noopAuth
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    session.headers["Connection"] = "keep-alive"
+
+    adapter = GitHubAdapter(
+        timeout=timeout,
+        metrics=metrics,
+        cache=cache,
+        scheduler=scheduler,
+        pool_connections=max_hosts,
+        pool_maxsize=pool_size,
+        pool_block=True
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def shared_session_connection(base_class, session, request_timeout):
+    """Create a PyGithub connection class that sends through session"""
+    secure = base_class is HTTPSRequestsConnectionClass
+
+    class SharedSessionConnection(base_class):
+        def __init__(self, host, port=None, strict=False, timeout=None, retry=None, pool_size=None, **kwargs):
+            # Skip the base constructor, which builds a private requests.Session
+            self.host = host
+            self.port = port if port else (443 if secure else 80)
+            self.protocol = "https" if secure else "http"
+            # PyGithub's single 15s timeout is replaced by connect/read timeouts
+            self.timeout = request_timeout
+            self.verify = kwargs.get("verify", True)
+            self.session = session
+
+        def close(self):
+            # The session outlives individual PyGithub connections
+            pass
+
+    return SharedSessionConnection
+
+def install_pygithub_session(session, timeout):
+    """Route every PyGithub request through the shared session"""
+    Requester.injectConnectionClasses(
+        shared_session_connection(HTTPRequestsConnectionClass, session, timeout),
+        shared_session_connection(HTTPSRequestsConnectionClass, session, timeout)
+    )
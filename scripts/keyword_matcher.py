@@ -0,0 +1,163 @@
+"""
+Single-pass keyword matcher for category, tool and framework detection
+
+All keywords are compiled into one prefix-trie regex guarded by word
+boundaries, so a README is scanned once instead of once per keyword, and
+short keywords no longer match inside other words ("ai" in "maintain",
+"app" in "happy"). Text can also be fed in chunks (e.g. straight from a
+streamed download) with the same result as scanning it whole.
+"""
+import re
+
+# Characters that continue a word; a keyword must not touch them on either side
+WORD_CHARS = "a-z0-9"
+
+def trie_expression(keywords):
+    """Compile keywords into a regex that shares common prefixes
+
+    A flat "a|b|c" alternation makes the regex engine retry every keyword at
+    every position; a trie only follows branches whose prefix matched.
+    Greedy optional tails keep longest-match-first semantics.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        expression = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # A keyword ends here, so the longer continuations are optional
+        if "" in node:
+            expression = f"(?:{expression})?"
+        return expression
+
+    return build(trie)
+
+class KeywordMatcher:
+    """Find category, tool and framework keywords in lowercase text"""
+
+    def __init__(self, category_keywords, tool_keywords):
+        self.categories = list(category_keywords)
+
+        # keyword -> (category indexes, tool names, framework names)
+        hits = {}
+        for index, (category, keywords) in enumerate(category_keywords.items()):
+            for keyword in keywords:
+                hits.setdefault(keyword, (set(), set(), set()))[0].add(index)
+        for keyword, kind in tool_keywords:
+            entry = hits.setdefault(keyword, (set(), set(), set()))
+            if kind == "tools":
+                entry[1].add(keyword.title())
+            else:
+                entry[2].add(keyword.title())
+
+        # The regex consumes the longest keyword at each position, so a
+        # phrase also carries the hits of keywords inside it
+        # ("react native" counts as "react" too)
+        for keyword, entry in hits.items():
+            for other, other_entry in hits.items():
+                if other != keyword and re.search(self._bounded(re.escape(other)), keyword):
+                    for mine, theirs in zip(entry, other_entry):
+                        mine.update(theirs)
+
+        # Category-only keywords also match their plural ("apps", "games");
+        # tool names stay exact so "nodes" is not reported as Node
+        for keyword, entry in list(hits.items()):
+            if not entry[1] and not entry[2]:
+                hits.setdefault(f"{keyword}s", entry)
+
+        self.hits = hits
+        self.pattern = re.compile(self._bounded(trie_expression(hits)))
+        # Longest text a match attempt can look at: the keyword plus the
+        # character checked by the trailing boundary
+        self.window = max(len(keyword) for keyword in hits) + 1
+
+    @staticmethod
+    def _bounded(expression):
+        return f"(?<![{WORD_CHARS}]){expression}(?![{WORD_CHARS}])"
+
+    def scanner(self):
+        """Start an incremental scan"""
+        return KeywordScanner(self)
+
+    def scan(self, description, readme, name, topics):
+        """Detect categories, tools and frameworks in one pass over the text
+
+        Categories consider all four inputs; tools and frameworks only the
+        description and README, as before. readme may be a string or an
+        iterable of text chunks.
+        """
+        scanner = self.scanner()
+        scanner.feed(f"{description} ")
+        for chunk in ([readme] if isinstance(readme, str) else readme):
+            scanner.feed(chunk)
+        scanner.end_tool_region()
+        scanner.feed(f" {name} {' '.join(topics)}")
+        return scanner.result()
+
+class KeywordScanner:
+    """Keyword scan over text that arrives in chunks
+
+    Only a short tail of the text is kept between chunks. A match is
+    accepted once the text after its start covers the matcher's window,
+    so a keyword (or a longer phrase containing it) split across chunks
+    is found exactly as in the whole text. Chunks are lowercased as they
+    arrive.
+    """
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.buffer = ""
+        # Position in buffer where the next match may start; the character
+        # before it is kept for the leading word boundary
+        self.position = 0
+        # Absolute offset of buffer[0] in the whole text
+        self.offset = 0
+        self.tool_region_end = None
+
+        self.category_indexes = set()
+        self.tools = set()
+        self.frameworks = set()
+
+    def feed(self, text):
+        """Scan the next chunk of text"""
+        if text:
+            self.buffer += text.lower()
+            self._scan(final=False)
+
+    def end_tool_region(self):
+        """Mark the end of the text where tools and frameworks count"""
+        self.tool_region_end = self.offset + len(self.buffer)
+
+    def _scan(self, final):
+        buffer = self.buffer
+        # Matches starting at or after limit could still change with more text
+        limit = len(buffer) if final else len(buffer) - self.matcher.window
+        resume = self.position
+        for match in self.matcher.pattern.finditer(buffer, self.position):
+            if match.start() >= limit:
+                break
+            entry = self.matcher.hits[match.group()]
+            self.category_indexes.update(entry[0])
+            if self.tool_region_end is None or self.offset + match.end() <= self.tool_region_end:
+                self.tools.update(entry[1])
+                self.frameworks.update(entry[2])
+            resume = match.end()
+
+        # Drop everything before the next start except one boundary character
+        resume = max(resume, limit)
+        drop = max(0, resume - 1)
+        self.buffer = buffer[drop:]
+        self.offset += drop
+        self.position = resume - drop
+
+    def result(self):
+        """Finish the scan and return (categories, tools, frameworks)"""
+        self._scan(final=True)
+        categories = [self.matcher.categories[i] for i in sorted(self.category_indexes)]
+        return categories, self.tools, self.frameworks
@@ -0,0 +1,289 @@
+"""
+Run instrumentation: phase timers, per-endpoint API statistics and traces
+
+A Metrics object collects how long each phase of a run took, every API
+call (grouped by endpoint, with a latency histogram), which repositories
+had the slowest calls, and, optionally, a trace of individual spans in
+the Chrome trace event format (chrome://tracing, https://ui.perfetto.dev).
+It is written as JSON next to the generated README together with the
+rate limit and cache counters of the run and any size caps that were hit.
+Worker processes export their state, which the parent merges into its own.
+"""
+import os
+import re
+import json
+import time
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# Upper bounds (milliseconds) of the request latency histogram buckets
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+# How many repositories are listed in the slowest-call attribution
+SLOWEST_REPOS = 20
+
+# How many affected items are listed for each limit that was hit
+LIMIT_EXAMPLES = 20
+
+# REST paths are grouped by their templates, not by concrete names
+ENDPOINT_PATTERNS = [
+    (re.compile(r"/repos/[^/]+/[^/]+(?P<rest>/.*)?$"), "/repos/{owner}/{repo}"),
+    (re.compile(r"/users/[^/]+(?P<rest>/.*)?$"), "/users/{user}"),
+    (re.compile(r"/orgs/[^/]+(?P<rest>/.*)?$"), "/orgs/{org}"),
+]
+REPO_PATTERN = re.compile(r"/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)")
+SHA_PATTERN = re.compile(r"/[0-9a-f]{40}(?=/|$)")
+
+def endpoint_name(method, url):
+    """Group a request URL under its endpoint template, e.g. GET /repos/{owner}/{repo}/readme"""
+    path = urlsplit(url).path.rstrip("/")
+    for pattern, template in ENDPOINT_PATTERNS:
+        match = pattern.search(path)
+        if match:
+            path = template + SHA_PATTERN.sub("/{sha}", match.group("rest") or "")
+            break
+    else:
+        # Keep only the last segment of unknown paths (e.g. /api/graphql)
+        path = "/" + path.rsplit("/", 1)[-1]
+    return f"{method} {path}"
+
+def repo_name(url):
+    """Get owner/repo for a repository endpoint URL, or None"""
+    match = REPO_PATTERN.search(urlsplit(url).path)
+    return f"{match.group('owner')}/{match.group('repo')}" if match else None
+
+class Metrics:
+    """Thread-safe collector for one run"""
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.origin = time.perf_counter()
+
+        # name -> count, seconds
+        self.phases = {}
+        # endpoint -> calls, errors, seconds, max_seconds, histogram
+        self.endpoints = {}
+        # owner/repo -> calls, seconds, slowest_seconds, slowest_endpoint
+        self.repos = {}
+        self.counters = {}
+        # name -> limit, count, items (first few that hit it)
+        self.limits = {}
+        self.events = []
+        # Cache and rate limit counters of worker processes merged in
+        self.shards = []
+
+    def _event(self, name, category, start, seconds, args=None):
+        """Append a complete ("X") trace event; timestamps are microseconds"""
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((start - self.origin) * 1e6),
+            "dur": round(seconds * 1e6),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    @contextmanager
+    def phase(self, name, **args):
+        """Time a block of work; repeated and concurrent phases add up"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self.lock:
+                phase = self.phases.setdefault(name, {"count": 0, "seconds": 0.0})
+                phase["count"] += 1
+                phase["seconds"] += seconds
+                if self.trace:
+                    self._event(name, "phase", start, seconds, args)
+
+    def count(self, name, amount=1):
+        """Increment a free-form counter"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def limit_reached(self, name, limit, item):
+        """Record that a size cap cut item short"""
+        with self.lock:
+            entry = self.limits.setdefault(name, {"limit": limit, "count": 0, "items": []})
+            entry["count"] += 1
+            if len(entry["items"]) < LIMIT_EXAMPLES:
+                entry["items"].append(item)
+
+    def record_request(self, method, url, status, start, seconds):
+        """Record one API call, including its retries and cache revalidation"""
+        endpoint = endpoint_name(method, url)
+        repo = repo_name(url)
+        bucket = next(
+            (f"<={bound}ms" for bound in LATENCY_BUCKETS_MS if seconds * 1000 <= bound),
+            f">{LATENCY_BUCKETS_MS[-1]}ms"
+        )
+
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = {
+                    "calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0,
+                    "histogram": dict.fromkeys(
+                        [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"], 0
+                    ),
+                }
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["histogram"][bucket] += 1
+            if status is None or status >= 400:
+                stats["errors"] += 1
+
+            if repo is not None:
+                repo_stats = self.repos.setdefault(
+                    repo, {"calls": 0, "seconds": 0.0, "slowest_seconds": 0.0, "slowest_endpoint": None}
+                )
+                repo_stats["calls"] += 1
+                repo_stats["seconds"] += seconds
+                if seconds >= repo_stats["slowest_seconds"]:
+                    repo_stats["slowest_seconds"] = seconds
+                    repo_stats["slowest_endpoint"] = endpoint
+
+            if self.trace:
+                self._event(endpoint, "http", start, seconds, {"url": url, "status": status})
+
+    def to_dict(self, http_cache=None, scheduler=None):
+        """Build the metrics document, adding cache and rate limit counters if given"""
+        with self.lock:
+            endpoints = {}
+            for endpoint, stats in sorted(self.endpoints.items()):
+                endpoints[endpoint] = dict(
+                    stats,
+                    seconds=round(stats["seconds"], 4),
+                    max_seconds=round(stats["max_seconds"], 4),
+                    mean_seconds=round(stats["seconds"] / stats["calls"], 4),
+                )
+
+            slowest = sorted(self.repos.items(), key=lambda item: (-item[1]["slowest_seconds"], item[0]))
+            document = {
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started)),
+                "wall_seconds": round(time.perf_counter() - self.origin, 4),
+                "phases": {
+                    name: {"count": phase["count"], "seconds": round(phase["seconds"], 4)}
+                    for name, phase in self.phases.items()
+                },
+                "api": {
+                    "calls": sum(stats["calls"] for stats in self.endpoints.values()),
+                    "endpoints": endpoints,
+                },
+                "slowest_repos": [
+                    {
+                        "repo": repo,
+                        **stats,
+                        "seconds": round(stats["seconds"], 4),
+                        "slowest_seconds": round(stats["slowest_seconds"], 4),
+                    }
+                    for repo, stats in slowest[:SLOWEST_REPOS]
+                ],
+                "counters": dict(sorted(self.counters.items())),
+                "limits": {
+                    name: dict(entry, items=list(entry["items"]))
+                    for name, entry in sorted(self.limits.items())
+                },
+            }
+            if self.shards:
+                document["shards"] = list(self.shards)
+
+        if http_cache is not None:
+            with http_cache.lock:
+                document["cache"] = dict(http_cache.stats, entries=len(http_cache.index))
+        if scheduler is not None:
+            with scheduler.condition:
+                document["rate_limit"] = dict(
+                    scheduler.stats,
+                    wait_seconds=round(scheduler.stats["wait_seconds"], 2),
+                    resources={resource: dict(state) for resource, state in sorted(scheduler.resources.items())},
+                )
+        return document
+
+    def export(self, http_cache=None, scheduler=None):
+        """Get the raw collected state, to be merged into another process's Metrics"""
+        document = self.to_dict(http_cache, scheduler)
+        with self.lock:
+            return {
+                "started": self.started,
+                "phases": {name: dict(phase) for name, phase in self.phases.items()},
+                "endpoints": {
+                    endpoint: dict(stats, histogram=dict(stats["histogram"]))
+                    for endpoint, stats in self.endpoints.items()
+                },
+                "repos": {repo: dict(stats) for repo, stats in self.repos.items()},
+                "counters": dict(self.counters),
+                "limits": {name: dict(entry, items=list(entry["items"])) for name, entry in self.limits.items()},
+                "events": list(self.events),
+                "cache": document.get("cache"),
+                "rate_limit": document.get("rate_limit"),
+            }
+
+    def merge(self, state, label):
+        """Add the state exported by a worker process (e.g. one shard) to this run"""
+        with self.lock:
+            for name, phase in state["phases"].items():
+                total = self.phases.setdefault(name, {"count": 0, "seconds": 0.0})
+                total["count"] += phase["count"]
+                total["seconds"] += phase["seconds"]
+
+            for endpoint, stats in state["endpoints"].items():
+                total = self.endpoints.get(endpoint)
+                if total is None:
+                    self.endpoints[endpoint] = dict(stats, histogram=dict(stats["histogram"]))
+                    continue
+                for key in ("calls", "errors", "seconds"):
+                    total[key] += stats[key]
+                total["max_seconds"] = max(total["max_seconds"], stats["max_seconds"])
+                for bucket, count in stats["histogram"].items():
+                    total["histogram"][bucket] += count
+
+            for repo, stats in state["repos"].items():
+                total = self.repos.get(repo)
+                if total is None:
+                    self.repos[repo] = dict(stats)
+                    continue
+                total["calls"] += stats["calls"]
+                total["seconds"] += stats["seconds"]
+                if stats["slowest_seconds"] >= total["slowest_seconds"]:
+                    total["slowest_seconds"] = stats["slowest_seconds"]
+                    total["slowest_endpoint"] = stats["slowest_endpoint"]
+
+            for name, count in state["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + count
+
+            for name, entry in state["limits"].items():
+                total = self.limits.setdefault(name, {"limit": entry["limit"], "count": 0, "items": []})
+                total["count"] += entry["count"]
+                total["items"].extend(entry["items"][:LIMIT_EXAMPLES - len(total["items"])])
+
+            if self.trace:
+                # Event times are relative to the worker's start; shift them onto ours
+                offset = round((state["started"] - self.started) * 1e6)
+                self.events.extend(dict(event, ts=event["ts"] + offset) for event in state["events"])
+
+            shard = {"shard": label}
+            for section in ("cache", "rate_limit"):
+                if state.get(section) is not None:
+                    shard[section] = state[section]
+            self.shards.append(shard)
+
+    def write(self, path, http_cache=None, scheduler=None, trace_path=None):
+        """Write the metrics JSON, and the trace if one was collected"""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(http_cache, scheduler), f, indent=2)
+        if trace_path and self.trace:
+            with self.lock:
+                events = list(self.events)
+            with open(trace_path, "w") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,200 @@
+"""
+Rate-limit-aware request scheduling
+
+Every GitHub response carries the remaining request budget. The scheduler
+reads it (X-RateLimit-Remaining / X-RateLimit-Reset, plus Retry-After),
+lowers the number of requests allowed in flight as the budget drains,
+waits for the reset window when it is exhausted, and retries secondary
+rate limits, 429s and 5xx responses with jittered exponential backoff.
+"""
+import time
+import random
+import threading
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+
+# Server errors worth retrying; anything else is returned to the caller
+RETRY_STATUSES = {500, 502, 503, 504}
+
+class RateLimitScheduler:
+    """Shared request budget and concurrency gate for all GitHub traffic"""
+
+    def __init__(self, max_concurrency, max_retries=5, base_delay=1.0, max_delay=60.0, max_wait=900.0):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # Longest we are willing to sleep for a rate limit reset
+        self.max_wait = max_wait
+
+        self.condition = threading.Condition()
+        self.in_flight = 0
+
+        # resource ("core", "graphql", ...) -> limit, remaining, reset, used
+        self.resources = {}
+        self.stats = {"requests": 0, "not_modified": 0, "retries": 0, "wait_seconds": 0.0}
+
+    def _budget_fraction(self):
+        """Fraction of the budget left on the most depleted resource"""
+        fractions = [
+            state["remaining"] / state["limit"]
+            for state in self.resources.values()
+            if state["limit"] and state["reset"] > time.time()
+        ]
+        return min(fractions) if fractions else 1.0
+
+    def allowed_concurrency(self):
+        """Requests allowed in flight given the remaining budget"""
+        fraction = self._budget_fraction()
+        if fraction > 0.25:
+            return self.max_concurrency
+        if fraction > 0.1:
+            return max(1, self.max_concurrency // 2)
+        return 1
+
+    def _exhausted_wait(self):
+        """Seconds until the reset of an exhausted resource, if any"""
+        now = time.time()
+        waits = [
+            state["reset"] - now
+            for state in self.resources.values()
+            if state["remaining"] == 0 and state["reset"] > now
+        ]
+        return max(waits) if waits else 0
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        wait = self._exhausted_wait()
+        if 0 < wait <= self.max_wait:
+            print(f"Rate limit exhausted, waiting {wait:.0f}s for reset")
+            self.sleep(wait + 1)
+
+        with self.condition:
+            while self.in_flight >= self.allowed_concurrency():
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        """Mark an in-flight request as finished"""
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def sleep(self, seconds, retry=False):
+        """Sleep outside the gate, accounting the time to this run"""
+        with self.condition:
+            self.stats["wait_seconds"] += seconds
+            if retry:
+                self.stats["retries"] += 1
+        time.sleep(seconds)
+
+    def record(self, response):
+        """Update the budget from a response's rate limit headers"""
+        headers = response.headers
+        with self.condition:
+            self.stats["requests"] += 1
+            if response.status_code == 304:
+                self.stats["not_modified"] += 1
+
+            if "X-RateLimit-Remaining" not in headers:
+                return
+            try:
+                limit = int(headers.get("X-RateLimit-Limit", 0))
+                remaining = int(headers["X-RateLimit-Remaining"])
+                reset = int(headers.get("X-RateLimit-Reset", 0))
+            except ValueError:
+                return
+            resource = headers.get("X-RateLimit-Resource", "core")
+
+            state = self.resources.get(resource)
+            if state is None:
+                # The first response already spent one request unless it was a 304
+                state = {"limit": limit, "remaining": remaining, "reset": reset,
+                         "used": 0 if response.status_code == 304 else 1}
+                self.resources[resource] = state
+            elif reset == state["reset"]:
+                # Concurrent responses can arrive out of order; keep the lowest
+                state["used"] += max(0, state["remaining"] - remaining)
+                state["remaining"] = min(state["remaining"], remaining)
+            else:
+                # A new window started since the last response
+                state["used"] += max(0, limit - remaining)
+                state.update(limit=limit, remaining=remaining, reset=reset)
+            self.condition.notify_all()
+
+    def retry_delay(self, response, attempt):
+        """Seconds to wait before retrying a response, or None to give up"""
+        if attempt >= self.max_retries:
+            return None
+
+        status = response.status_code
+        headers = response.headers
+        if status == 403:
+            # Plain permission errors are final; rate limits are not
+            rate_limited = (
+                "Retry-After" in headers
+                or headers.get("X-RateLimit-Remaining") == "0"
+                or "rate limit" in response.text.lower()
+            )
+            if not rate_limited:
+                return None
+        elif status != 429 and status not in RETRY_STATUSES:
+            return None
+
+        if "Retry-After" in headers:
+            try:
+                return min(float(headers["Retry-After"]), self.max_wait)
+            except ValueError:
+                pass
+        if headers.get("X-RateLimit-Remaining") == "0" and "X-RateLimit-Reset" in headers:
+            wait = int(headers["X-RateLimit-Reset"]) - time.time() + 1
+            return wait if 0 < wait <= self.max_wait else None
+
+        return self.backoff(attempt)
+
+    def backoff(self, attempt):
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def summary(self):
+        """Get a one-line summary of the rate limit budget used by this run"""
+        budgets = ", ".join(
+            f"{resource}: {state['used']} used, {state['remaining']}/{state['limit']} left"
+            for resource, state in sorted(self.resources.items())
+        ) or "no rate limit headers seen"
+        return (
+            f"API budget: {self.stats['requests']} requests ({self.stats['not_modified']} not modified), "
+            f"{self.stats['retries']} retries, {self.stats['wait_seconds']:.0f}s waiting; {budgets}"
+        )
+
+class RateLimitedAdapter(HTTPAdapter):
+    """Transport adapter that sends every request through a RateLimitScheduler"""
+
+    def __init__(self, scheduler, **kwargs):
+        self.scheduler = scheduler
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        scheduler = self.scheduler
+        attempt = 0
+        while True:
+            scheduler.acquire()
+            try:
+                response = super().send(request, **kwargs)
+            except (ConnectionError, Timeout) as e:
+                if attempt >= scheduler.max_retries:
+                    raise
+                delay = scheduler.backoff(attempt)
+                print(f"Retrying {request.url} in {delay:.1f}s ({e.__class__.__name__})")
+            else:
+                scheduler.record(response)
+                delay = scheduler.retry_delay(response, attempt)
+                if delay is None:
+                    return response
+                print(f"Retrying {request.url} in {delay:.1f}s (HTTP {response.status_code})")
+                response.close()
+            finally:
+                scheduler.release()
+
+            scheduler.sleep(delay, retry=True)
+            attempt += 1
@@ -0,0 +1,216 @@
+"""
+Manifest-based tool and framework detection
+
+Works from a repository's recursive git tree: some files identify a tool
+just by existing (a Dockerfile, a workflow under .github/workflows, *.tf),
+others are small manifests whose dependencies name frameworks and
+databases (package.json, requirements*.txt, pyproject.toml,
+docker-compose.yml). Only the latter are downloaded. Names are the display
+names of scripts/badges.yml.
+"""
+import re
+import json
+import tomllib
+import posixpath
+
+# Directories holding third-party or generated code, not the project's stack
+IGNORED_DIRS = {"node_modules", "vendor", "third_party", "site-packages", ".venv", "venv", "dist", "build"}
+
+# Files that identify a tool by their presence: (kind, name)
+PRESENCE_FILES = {
+    "dockerfile": ("tools", "Docker"),
+    "jenkinsfile": ("tools", "Jenkins"),
+    "chart.yaml": ("tools", "Kubernetes"),
+    "kustomization.yaml": ("tools", "Kubernetes"),
+    "ansible.cfg": ("tools", "Ansible"),
+    ".gitlab-ci.yml": ("tools", "GitLab"),
+    "netlify.toml": ("tools", "Netlify"),
+    "vercel.json": ("tools", "Vercel"),
+    "yarn.lock": ("tools", "Yarn"),
+    "package-lock.json": ("tools", "npm"),
+    "package.json": ("frameworks", "Node.js"),
+}
+
+# Manifests worth downloading, by file name -> parser kind
+MANIFEST_FILES = {
+    "package.json": "npm",
+    "requirements.txt": "requirements",
+    "pyproject.toml": "pyproject",
+    "docker-compose.yml": "compose",
+    "docker-compose.yaml": "compose",
+    "compose.yml": "compose",
+    "compose.yaml": "compose",
+}
+
+# Dependency names -> (kind, name); databases count as frameworks, like the
+# keyword detection
+NPM_PACKAGES = {
+    "react": ("frameworks", "React"),
+    "vue": ("frameworks", "Vue"),
+    "@angular/core": ("frameworks", "Angular"),
+    "express": ("frameworks", "Express"),
+    "pg": ("frameworks", "PostgreSQL"),
+    "mysql": ("frameworks", "MySQL"),
+    "mysql2": ("frameworks", "MySQL"),
+    "mongodb": ("frameworks", "MongoDB"),
+    "mongoose": ("frameworks", "MongoDB"),
+    "redis": ("frameworks", "Redis"),
+    "ioredis": ("frameworks", "Redis"),
+    "sqlite3": ("frameworks", "SQLite"),
+    "better-sqlite3": ("frameworks", "SQLite"),
+    "aws-sdk": ("tools", "AWS"),
+}
+PYTHON_PACKAGES = {
+    "django": ("frameworks", "Django"),
+    "flask": ("frameworks", "Flask"),
+    "psycopg": ("frameworks", "PostgreSQL"),
+    "psycopg2": ("frameworks", "PostgreSQL"),
+    "psycopg2-binary": ("frameworks", "PostgreSQL"),
+    "mysqlclient": ("frameworks", "MySQL"),
+    "pymysql": ("frameworks", "MySQL"),
+    "pymongo": ("frameworks", "MongoDB"),
+    "redis": ("frameworks", "Redis"),
+    "boto3": ("tools", "AWS"),
+    "ansible": ("tools", "Ansible"),
+}
+COMPOSE_IMAGES = {
+    "postgres": ("frameworks", "PostgreSQL"),
+    "mysql": ("frameworks", "MySQL"),
+    "mongo": ("frameworks", "MongoDB"),
+    "redis": ("frameworks", "Redis"),
+}
+
+REQUIREMENT_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*")
+
+def normalize_package(name):
+    """Normalize a Python distribution name (PEP 503)"""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def toml_table(data, key):
+    """Get a table from parsed TOML, or {} when it is missing or not a table"""
+    value = data.get(key)
+    return value if isinstance(value, dict) else {}
+
+def toml_list(data, key):
+    """Get a copy of an array from parsed TOML, or [] when it is missing or not an array"""
+    value = data.get(key)
+    return list(value) if isinstance(value, list) else []
+
+def plan(entries, max_manifest_bytes, max_manifests):
+    """Detect what the tree alone reveals and pick the manifests to fetch
+
+    entries are git tree entries (path, type, sha, size). Returns
+    (tools, frameworks, manifests) where manifests is a list of
+    (path, sha, parser kind), shallowest first.
+    """
+    tools = set()
+    frameworks = set()
+    manifests = []
+    for entry in entries:
+        if entry.get("type") != "blob":
+            continue
+        path = entry["path"]
+        parts = path.split("/")
+        if IGNORED_DIRS.intersection(parts[:-1]):
+            continue
+        filename = parts[-1].lower()
+
+        found = PRESENCE_FILES.get(filename)
+        if found is None:
+            if filename.endswith(".dockerfile") or MANIFEST_FILES.get(filename) == "compose":
+                found = ("tools", "Docker")
+            elif filename.endswith(".tf"):
+                found = ("tools", "Terraform")
+            elif parts[:2] == [".github", "workflows"] and filename.endswith((".yml", ".yaml")):
+                found = ("tools", "GitHub Actions")
+        if found is not None:
+            (tools if found[0] == "tools" else frameworks).add(found[1])
+
+        kind = MANIFEST_FILES.get(filename)
+        if kind is None and filename.startswith("requirements") and filename.endswith(".txt"):
+            kind = "requirements"
+        if kind is not None and entry.get("size", 0) <= max_manifest_bytes:
+            manifests.append((path, entry["sha"], kind))
+
+    manifests.sort(key=lambda manifest: (manifest[0].count("/"), manifest[0]))
+    return tools, frameworks, manifests[:max_manifests]
+
+def dependency_names(kind, text):
+    """Extract the dependency (or image) names a manifest declares"""
+    if kind == "npm":
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return set()
+        if not isinstance(data, dict):
+            return set()
+        names = set()
+        for section in ("dependencies", "devDependencies", "peerDependencies"):
+            if isinstance(data.get(section), dict):
+                names.update(data[section])
+        return names
+
+    if kind == "requirements":
+        names = set()
+        for line in text.splitlines():
+            line = line.strip()
+            # Options (-r, -e, --hash) and comments are not packages
+            match = REQUIREMENT_NAME.match(line)
+            if match:
+                names.add(normalize_package(match.group()))
+        return names
+
+    if kind == "pyproject":
+        try:
+            data = tomllib.loads(text)
+        except tomllib.TOMLDecodeError:
+            return set()
+        # PEP 621 requirement strings ("django>=4"), including extras
+        project = toml_table(data, "project")
+        requirements = toml_list(project, "dependencies")
+        for extra in toml_table(project, "optional-dependencies").values():
+            requirements += extra if isinstance(extra, list) else []
+        names = set()
+        for requirement in requirements:
+            match = REQUIREMENT_NAME.match(requirement) if isinstance(requirement, str) else None
+            if match:
+                names.add(normalize_package(match.group()))
+
+        # Poetry keys (django = "^4") in the main, dev and group tables
+        poetry = toml_table(toml_table(data, "tool"), "poetry")
+        tables = [toml_table(poetry, "dependencies"), toml_table(poetry, "dev-dependencies")]
+        for group in toml_table(poetry, "group").values():
+            tables.append(toml_table(group, "dependencies") if isinstance(group, dict) else {})
+        for table in tables:
+            names.update(normalize_package(name) for name in table)
+        return names
+
+    if kind == "compose":
+        import yaml
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError:
+            return set()
+        services = data.get("services") if isinstance(data, dict) else None
+        names = set()
+        for service in (services or {}).values():
+            image = service.get("image") if isinstance(service, dict) else None
+            if isinstance(image, str):
+                # registry/namespace/name:tag -> name
+                names.add(posixpath.basename(image.split("@")[0]).split(":")[0].lower())
+        return names
+
+    return set()
+
+def parse_manifest(kind, text):
+    """Detect tools and frameworks from one manifest's content"""
+    table = {
+        "npm": NPM_PACKAGES, "requirements": PYTHON_PACKAGES, "pyproject": PYTHON_PACKAGES, "compose": COMPOSE_IMAGES
+    }[kind]
+    tools = set()
+    frameworks = set()
+    for name in dependency_names(kind, text):
+        found = table.get(name)
+        if found is not None:
+            (tools if found[0] == "tools" else frameworks).add(found[1])
+    return tools, frameworks
@@ -8,126 +8,355 @@ with technology stack information, repository statistics, and contribution data.
 import os
 import re
 import json
-import requests
-from github import Github
+import codecs
+import argparse
+import hashlib
+import threading
+import time
+from keyword_matcher import KeywordMatcher
 from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from urllib.parse import quote
 from datetime import datetime
+from string import Template
 
 # Configuration
-# Try to get username from environment variables if running in GitHub Actions
-USERNAME = os.getenv("GITHUB_REPOSITORY", "").split("/")[0]
-# If not found, use a default username for local testing
-if not USERNAME:
+# Username, token and API clients are resolved lazily by Context below
+API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", f"{API_URL}/graphql")
+EXCLUDE_REPOS = [""]  # Add repository names to exclude
+EXCLUDE_LANGS = [""]  # Add languages to exclude from the analysis
+MAX_LANG_DISPLAY = 15  # Maximum number of languages to display
+BADGES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "badges.yml")  # Badge style registry
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "8"))  # Concurrent repository fetches
+DATA_BACKEND = os.getenv("DATA_BACKEND", "rest")  # "rest" or "graphql"
+GRAPHQL_PAGE_SIZE = int(os.getenv("GRAPHQL_PAGE_SIZE", "100"))  # Repositories per GraphQL page (max 100)
+STATE_DIR = os.getenv("STATE_DIR", ".cache")  # Per-repo analysis records between runs
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join(STATE_DIR, "http"))  # On-disk conditional request cache
+HTTP_CACHE_MAX_MB = int(os.getenv("HTTP_CACHE_MAX_MB", "100"))  # Cache size before LRU eviction
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", "5"))  # Retries for rate limited / 5xx responses
+RATE_LIMIT_MAX_WAIT = int(os.getenv("RATE_LIMIT_MAX_WAIT", "900"))  # Longest sleep for a rate limit reset (seconds)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))  # Users processed at once in batch mode
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", str(MAX_WORKERS)))  # Keep-alive connections per host
+# (connect, read) timeouts in seconds for every GitHub request
+HTTP_TIMEOUT = (float(os.getenv("HTTP_CONNECT_TIMEOUT", "10")), float(os.getenv("HTTP_READ_TIMEOUT", "30")))
+METRICS_FILE = os.getenv("METRICS_FILE", "metrics.json")  # Run metrics, written next to the README (empty to skip)
+TRACE_FILE = os.getenv("TRACE_FILE", "")  # Chrome trace of phases and API calls, written next to the README
+RUN_TIME_BUDGET = float(os.getenv("RUN_TIME_BUDGET", "0"))  # Seconds spent analyzing repositories (0 = unlimited)
+RUN_REQUEST_BUDGET = int(os.getenv("RUN_REQUEST_BUDGET", "0"))  # API requests per run (0 = unlimited)
+README_MAX_BYTES = int(os.getenv("README_MAX_BYTES", str(512 * 1024)))  # Bytes of each README scanned for keywords
+README_CHUNK_SIZE = 64 * 1024  # Streamed README read size
+MANIFEST_MAX_BYTES = int(os.getenv("MANIFEST_MAX_BYTES", str(64 * 1024)))  # Larger manifests are not downloaded
+MAX_MANIFESTS = int(os.getenv("MAX_MANIFESTS", "8"))  # Manifests parsed per repository
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")  # Secret of the GitHub webhook, required by --serve
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "127.0.0.1")  # Address --serve listens on
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))  # Port --serve listens on
+WEBHOOK_DEBOUNCE = float(os.getenv("WEBHOOK_DEBOUNCE", "10"))  # Quiet seconds after an event before re-rendering
+WEBHOOK_MAX_DELAY = float(os.getenv("WEBHOOK_MAX_DELAY", "120"))  # Longest a burst of events postpones a re-render
+HISTORY_FILE = os.getenv("HISTORY_FILE", os.path.join(STATE_DIR, "history.sqlite"))  # Run history for trends (empty to skip)
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", "730"))  # Runs older than this are dropped (0 = never)
+TREND_PERIODS = {"Week": 7, "Month": 30}  # Trend columns: label -> days back
+TREND_LANGUAGES = 5  # Top languages listed in the trends table
+
+def resolve_username():
+    """Determine which GitHub user the profile is generated for"""
+    # Try to get username from environment variables if running in GitHub Actions
+    username = os.getenv("GITHUB_REPOSITORY", "").split("/")[0]
+    if username:
+        return username
+    
+    # If not found, use a default username for local testing
     try:
         # Try to get username from the GitHub context if available
         github_event_path = os.getenv("GITHUB_EVENT_PATH", "")
         if github_event_path and os.path.exists(github_event_path):
             with open(github_event_path, "r") as f:
                 event = json.load(f)
-                USERNAME = event.get("repository", {}).get("owner", {}).get("login", "")
-        # If still no username, use a default
-        if not USERNAME:
-            USERNAME = "Tibutti"  # Default to the GitHub account Tibutti
+                username = event.get("repository", {}).get("owner", {}).get("login", "")
     except (json.JSONDecodeError, FileNotFoundError):
-        USERNAME = "Tibutti"  # Default fallback
+        pass
+    
+    # If still no username, use a default
+    return username or "Tibutti"  # Default to the GitHub account Tibutti
 
-# Get GitHub token from environment variables
-TOKEN = os.getenv("GITHUB_TOKEN")
-API_URL = "https://api.github.com"
-EXCLUDE_REPOS = [""]  # Add repository names to exclude
-EXCLUDE_LANGS = [""]  # Add languages to exclude from the analysis
-MAX_LANG_DISPLAY = 15  # Maximum number of languages to display
+class Context:
+    """Configuration and API clients, created on first use
 
-# Check if we're in test mode (no GitHub token)
-TEST_MODE = TOKEN is None
+    Importing this module does not read the event file, import PyGithub or
+    requests, or build any client; that happens the first time a property
+    is accessed, so callers that only render a README never pay for it.
+    """
 
-# Initialize GitHub API client if token is available
-# g will be used only after we check for TEST_MODE, so even if it's None, 
-# we'll avoid calling methods on it
-g = None
-if not TEST_MODE:
-    try:
-        g = Github(TOKEN)
-    except Exception as e:
-        print(f"Error initializing GitHub client: {e}")
-        TEST_MODE = True  # Force test mode if client initialization fails
+    def __init__(self, token=None, username=None, shard=None):
+        # Get GitHub token from environment variables
+        self.token = token if token is not None else os.getenv("GITHUB_TOKEN")
+        self._username = username
+        # (index, count): only repositories in this shard are analyzed
+        self.shard = shard
+        self._values = {}
+        # Re-entrant: building the client needs the session
+        self._lock = threading.RLock()
 
-def get_language_badge(lang):
-    """Generate a badge for a programming language using shields.io"""
-    # Dictionary mapping language names to shield styles and colors
-    lang_style = {
-        "Python": {"logo": "python", "color": "3776AB"},
-        "JavaScript": {"logo": "javascript", "color": "F7DF1E", "logoColor": "black"},
-        "TypeScript": {"logo": "typescript", "color": "3178C6"},
-        "HTML": {"logo": "html5", "color": "E34F26"},
-        "CSS": {"logo": "css3", "color": "1572B6"},
-        "Java": {"logo": "java", "color": "007396"},
-        "C#": {"logo": "csharp", "color": "239120"},
-        "C++": {"logo": "cplusplus", "color": "00599C"},
-        "PHP": {"logo": "php", "color": "777BB4"},
-        "Ruby": {"logo": "ruby", "color": "CC342D"},
-        "Swift": {"logo": "swift", "color": "FA7343"},
-        "Go": {"logo": "go", "color": "00ADD8"},
-        "Rust": {"logo": "rust", "color": "000000"},
-        "Kotlin": {"logo": "kotlin", "color": "0095D5"},
-        "Dart": {"logo": "dart", "color": "0175C2"},
-        "Shell": {"logo": "gnubash", "color": "4EAA25"},
-        "Jupyter Notebook": {"logo": "jupyter", "color": "F37626"},
-        "R": {"logo": "r", "color": "276DC3"},
-        "Vue": {"logo": "vuedotjs", "color": "4FC08D"},
-        "React": {"logo": "react", "color": "61DAFB", "logoColor": "black"},
-        "Angular": {"logo": "angular", "color": "DD0031"},
-        "Django": {"logo": "django", "color": "092E20"},
-        "Flask": {"logo": "flask", "color": "000000"},
-        "Node.js": {"logo": "nodedotjs", "color": "339933"},
-        "Express": {"logo": "express", "color": "000000"},
-    }
+    def _lazy(self, name, factory):
+        """Create a value once, even when first requested from several threads"""
+        if name not in self._values:
+            with self._lock:
+                if name not in self._values:
+                    self._values[name] = factory()
+        return self._values[name]
+
+    @property
+    def username(self):
+        return self._lazy("username", lambda: self._username or resolve_username())
+
+    @property
+    def metrics(self):
+        """Phase timers and API call statistics for this run"""
+        def create():
+            from metrics import Metrics
+            return Metrics(trace=bool(TRACE_FILE))
+        return self._lazy("metrics", create)
     
-    # Normalize language name
-    norm_lang = lang.replace(" ", "").lower()
+    @property
+    def http_cache(self):
+        """On-disk conditional request cache"""
+        def create():
+            from http_cache import HTTPCache
+            # Shards running side by side must not overwrite each other's index
+            directory = HTTP_CACHE_DIR if self.shard is None else os.path.join(HTTP_CACHE_DIR, shard_label(self.shard))
+            return HTTPCache(directory, HTTP_CACHE_MAX_MB * 1024 * 1024)
+        return self._lazy("http_cache", create)
+
+    @property
+    def scheduler(self):
+        """Rate limit budget shared by every request"""
+        def create():
+            from rate_limit import RateLimitScheduler
+            return RateLimitScheduler(MAX_WORKERS, max_retries=MAX_RETRIES, max_wait=RATE_LIMIT_MAX_WAIT)
+        return self._lazy("scheduler", create)
+
+    @property
+    def session(self):
+        """Shared HTTP session; GET responses are revalidated against the
+        on-disk cache and every request passes through the scheduler"""
+        def create():
+            from http_session import create_session, install_pygithub_session
+            session = create_session(
+                self.http_cache, self.scheduler, HTTP_POOL_SIZE, HTTP_TIMEOUT, metrics=self.metrics
+            )
+            install_pygithub_session(session, HTTP_TIMEOUT)
+            return session
+        return self._lazy("session", create)
+
+    @property
+    def history(self):
+        """Local run history, or None if disabled"""
+        def create():
+            if not HISTORY_FILE:
+                return None
+            from history import HistoryStore
+            return HistoryStore(HISTORY_FILE, HISTORY_RETENTION_DAYS)
+        return self._lazy("history", create)
+
+    @property
+    def github(self):
+        """PyGithub client, or None without a token or if it cannot be created"""
+        def create():
+            if self.token is None:
+                return None
+            try:
+                from github import Github
+                # Route PyGithub through the shared session before first use
+                self.session
+                # PyGithub spaces requests 0.25s apart by default, which would
+                # serialize the worker pool; concurrency is bounded by MAX_WORKERS
+                return Github(
+                    self.token,
+                    base_url=API_URL,
+                    per_page=100,
+                    pool_size=HTTP_POOL_SIZE,
+                    seconds_between_requests=None
+                )
+            except Exception as e:
+                print(f"Error initializing GitHub client: {e}")
+                return None
+        return self._lazy("github", create)
+
+    @property
+    def test_mode(self):
+        """Sample data is used without a token or a working client"""
+        return self.token is None or self.github is None
+
+    def finish(self, output_dir=None):
+        """Persist the cache and report usage, if any requests were made
+        
+        With output_dir, the run metrics (and trace, if enabled) are written
+        there, next to the generated README.
+        """
+        http_cache = self._values.get("http_cache")
+        scheduler = self._values.get("scheduler")
+        history = self._values.get("history")
+        if history is not None:
+            history.close()
+        if http_cache is not None:
+            # Persist validators for the next run and report how much they saved
+            http_cache.save()
+            print(http_cache.summary())
+        if scheduler is not None:
+            print(scheduler.summary())
+        
+        if output_dir is not None and METRICS_FILE:
+            metrics_name, trace_name = METRICS_FILE, TRACE_FILE
+            if self.shard is not None:
+                # Shard jobs sharing a directory keep one file each
+                label = shard_label(self.shard)
+                root, ext = os.path.splitext(METRICS_FILE)
+                metrics_name = f"{root}.{label}{ext}"
+                if TRACE_FILE:
+                    root, ext = os.path.splitext(TRACE_FILE)
+                    trace_name = f"{root}.{label}{ext}"
+            metrics_path = os.path.join(output_dir, metrics_name)
+            trace_path = os.path.join(output_dir, trace_name) if trace_name else None
+            self.metrics.write(metrics_path, http_cache, scheduler, trace_path)
+            print(f"Run metrics written to {metrics_path}")
+
+_context = None
+_context_lock = threading.Lock()
+
+def get_context():
+    """Get the process-wide Context, creating it on first use"""
+    global _context
+    with _context_lock:
+        if _context is None:
+            _context = Context()
+        return _context
+
+def set_context(context):
+    """Replace the process-wide Context (e.g. to analyze a single shard)"""
+    global _context
+    with _context_lock:
+        _context = context
+
+# Module attributes kept for callers written against the eager globals
+LEGACY_ATTRIBUTES = {"USERNAME": "username", "TOKEN": "token", "TEST_MODE": "test_mode", "g": "github"}
+
+def __getattr__(name):
+    if name in LEGACY_ATTRIBUTES:
+        return getattr(get_context(), LEGACY_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Bump when detection changes so stored per-repo records are recomputed
+RECORD_VERSION = 3
+
+# Bump when the shard partial result format changes
+PARTIAL_VERSION = 1
+
+# Bump when the --fetch snapshot format changes
+SNAPSHOT_VERSION = 1
+
+# Category detection keywords
+CATEGORY_KEYWORDS = {
+    "Web Development": ["web", "website", "frontend", "backend", "fullstack", "react", "vue", "angular", "node", "express", "django", "flask", "html", "css", "javascript"],
+    "Data Science": ["data", "analysis", "analytics", "visualization", "machine learning", "ml", "ai", "artificial intelligence", "pandas", "numpy", "jupyter", "tensorflow", "pytorch"],
+    "Mobile Apps": ["mobile", "android", "ios", "app", "flutter", "react native", "swift", "kotlin"],
+    "Desktop Applications": ["desktop", "gui", "ui", "electron", "qt", "gtk", "wxwidgets"],
+    "DevOps": ["devops", "ci/cd", "pipeline", "automation", "kubernetes", "docker", "container", "jenkins", "github actions"],
+    "Game Development": ["game", "unity", "unreal", "godot", "pygame"],
+    "IoT": ["iot", "internet of things", "raspberry pi", "arduino", "embedded"],
+    "Blockchain": ["blockchain", "crypto", "web3", "ethereum", "smart contract", "solidity"],
+    "API": ["api", "rest", "graphql", "microservice"],
+    "Security": ["security", "cybersecurity", "encryption", "authentication", "authorization"],
+    "Automation": ["automation", "bot", "script", "scraper", "crawler"],
+    "Education": ["education", "learning", "tutorial", "course"],
+    "Documentation": ["documentation", "docs", "wiki"],
+    "Open Source": ["open source", "community", "contribution"]
+}
+
+# Framework and tool detection keywords (keyword, kind)
+TOOL_KEYWORDS = [
+    ("docker", "tools"),
+    ("kubernetes", "tools"),
+    ("django", "frameworks"),
+    ("flask", "frameworks"),
+    ("react", "frameworks"),
+    ("vue", "frameworks"),
+    ("angular", "frameworks"),
+    ("node", "frameworks"),
+    ("express", "frameworks"),
+    ("aws", "tools"),
+    ("azure", "tools"),
+    ("gcp", "tools"),
+    ("terraform", "tools"),
+    ("ansible", "tools"),
+    ("jenkins", "tools"),
+    ("github actions", "tools"),
+    ("postgresql", "databases"),
+    ("mysql", "databases"),
+    ("mongodb", "databases"),
+    ("redis", "databases"),
+    ("sqlite", "databases")
+]
+
+@lru_cache(maxsize=None)
+def get_keyword_matcher():
+    """Compile the keyword tables above once, on first use"""
+    return KeywordMatcher(CATEGORY_KEYWORDS, TOOL_KEYWORDS)
+
+def normalize_badge_name(name):
+    """Normalize a badge name for case- and whitespace-insensitive lookup"""
+    return " ".join(name.lower().split())
+
+@lru_cache(maxsize=None)
+def load_badge_registry():
+    """Load badge styles once, indexed by normalized name and alias"""
+    import yaml
     
-    # Check if we have a specific style for this language
-    style = lang_style.get(lang, {})
+    with open(BADGES_FILE, "r") as f:
+        data = yaml.safe_load(f)
     
-    logo = style.get("logo", norm_lang)
-    color = style.get("color", "007ec6")
-    logo_color = style.get("logoColor", "white")
+    defaults = data.get("defaults", {})
+    index = {}
+    for name, style in data["badges"].items():
+        style = dict(defaults, **(style or {}), name=name)
+        aliases = style.pop("aliases", [])
+        for key in [name, *aliases]:
+            index[normalize_badge_name(key)] = style
+    return defaults, index
+
+def shields_escape(text):
+    """Escape text for a shields.io static badge path segment"""
+    # shields.io reads "-" and "_" as separators; doubled they are literal
+    return quote(text.replace("-", "--").replace("_", "__"), safe="")
+
+@lru_cache(maxsize=None)
+def get_badge(name):
+    """Generate a shields.io badge for a language, framework or tool"""
+    defaults, index = load_badge_registry()
+    style = index.get(normalize_badge_name(name))
+    if style is None:
+        style = dict(defaults, name=name, logo=name.lower().replace(" ", ""))
     
-    badge_url = f"https://img.shields.io/badge/{lang}-{color}?style=for-the-badge&logo={logo}&logoColor={logo_color}"
-    return f"![{lang}]({badge_url})"
+    label = style["name"]
+    badge_url = (
+        f"https://img.shields.io/badge/{shields_escape(label)}-{style['color']}"
+        f"?style=for-the-badge&logo={quote(style['logo'], safe='')}&logoColor={style['logoColor']}"
+    )
+    return f"![{label}]({badge_url})"
+
+def canonical_badge_name(name):
+    """Map a detected name to its badge registry name ("aws" -> "AWS")"""
+    _, index = load_badge_registry()
+    style = index.get(normalize_badge_name(name))
+    return style["name"] if style else name
+
+def get_language_badge(lang):
+    """Generate a badge for a programming language using shields.io"""
+    return get_badge(lang)
 
 def get_tool_badge(tool, category=None):
     """Generate badges for development tools and frameworks"""
-    tool_style = {
-        "Git": {"logo": "git", "color": "F05032"},
-        "GitHub": {"logo": "github", "color": "181717"},
-        "GitLab": {"logo": "gitlab", "color": "FCA121"},
-        "Docker": {"logo": "docker", "color": "2496ED"},
-        "Kubernetes": {"logo": "kubernetes", "color": "326CE5"},
-        "VS Code": {"logo": "visualstudiocode", "color": "007ACC"},
-        "IntelliJ IDEA": {"logo": "intellijidea", "color": "000000"},
-        "PyCharm": {"logo": "pycharm", "color": "000000"},
-        "npm": {"logo": "npm", "color": "CB3837"},
-        "Yarn": {"logo": "yarn", "color": "2C8EBB"},
-        "AWS": {"logo": "amazonaws", "color": "232F3E"},
-        "Azure": {"logo": "microsoftazure", "color": "0078D4"},
-        "GCP": {"logo": "googlecloud", "color": "4285F4"},
-        "Heroku": {"logo": "heroku", "color": "430098"},
-        "Netlify": {"logo": "netlify", "color": "00C7B7"},
-        "Vercel": {"logo": "vercel", "color": "000000"},
-        "PostgreSQL": {"logo": "postgresql", "color": "336791"},
-        "MySQL": {"logo": "mysql", "color": "4479A1"},
-        "MongoDB": {"logo": "mongodb", "color": "47A248"},
-        "Redis": {"logo": "redis", "color": "DC382D"},
-        "SQLite": {"logo": "sqlite", "color": "003B57"},
-    }
-    
-    style = tool_style.get(tool, {})
-    logo = style.get("logo", tool.lower().replace(" ", ""))
-    color = style.get("color", "007ec6")
-    
-    badge_url = f"https://img.shields.io/badge/{tool.replace(' ', '%20')}-{color}?style=for-the-badge&logo={logo}"
-    return f"![{tool}]({badge_url})"
+    return get_badge(tool)
 
 def get_sample_repo_data():
     """Get sample repository data for testing without GitHub API"""
@@ -172,147 +401,831 @@ def get_sample_repo_data():
         "topics": sample_topics
     }
 
-def analyze_repositories():
-    """Analyze repositories to determine the technology stack"""
-    # Use sample data when in test mode
-    if TEST_MODE or g is None:
-        print("Running in test mode with sample data")
-        return get_sample_repo_data()
+def open_readme(url, name):
+    """Request a README as raw text, at most README_MAX_BYTES of it
     
-    # Real analysis using GitHub API
+    Returns an iterator over the decoded text in chunks, or None if the
+    repository has no README; other errors raise.
+    """
+    ctx = get_context()
+    # The raw media type skips the base64 JSON envelope; the range asks the
+    # server for one byte more than we scan, which tells a README cut at the
+    # cap from one exactly that long
+    headers = {"Accept": "application/vnd.github.raw", "Range": f"bytes=0-{README_MAX_BYTES}"}
+    if ctx.token:
+        headers["Authorization"] = f"token {ctx.token}"
+    
+    response = ctx.session.get(url, headers=headers, stream=True)
+    if response.status_code == 404:
+        response.close()
+        return None
+    if response.status_code == 416:
+        # An empty README cannot satisfy any range
+        response.close()
+        return iter(())
+    if response.status_code >= 400:
+        response.close()
+        response.raise_for_status()
+    return read_readme(response, name)
+
+def read_readme(response, name):
+    """Stream a README response as text, stopping at README_MAX_BYTES"""
+    metrics = get_context().metrics
+    
+    # Truncation is judged by the bytes that arrive, not by headers:
+    # Content-Length is the compressed size when the body is gzipped, and a
+    # server may ignore the range and send the whole README
+    truncated = False
+    # Incremental decoding: a chunk may end inside a multi-byte character
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    remaining = README_MAX_BYTES
     try:
-        user = g.get_user(USERNAME)
+        for chunk in response.iter_content(README_CHUNK_SIZE):
+            if len(chunk) > remaining:
+                # More than the cap arrived; stop reading there
+                chunk = chunk[:remaining]
+                truncated = True
+            remaining -= len(chunk)
+            metrics.count("readme_bytes", len(chunk))
+            yield decoder.decode(chunk)
+            if truncated:
+                break
+        yield decoder.decode(b"", final=True)
+    finally:
+        response.close()
+        if truncated:
+            metrics.limit_reached("readme_bytes", README_MAX_BYTES, name)
+
+def detect_stack(repo_url, ref, previous=None, tree_sha=None):
+    """Detect tools and frameworks from a repository's manifests
+    
+    One recursive tree request lists every file; only the small manifests
+    that need parsing are downloaded. previous is the stack stored with the
+    repository's last record: if the tree is unchanged (tree_sha known up
+    front, or the fetched tree's sha) it is reused without further requests.
+    Returns {"tree", "tools", "frameworks"}, or None for an empty repository.
+    """
+    from stack_detector import parse_manifest, plan
+    
+    ctx = get_context()
+    metrics = ctx.metrics
+    if previous and tree_sha and previous["tree"] == tree_sha:
+        metrics.count("stacks_reused")
+        return previous
+    
+    headers = {'Authorization': f'token {ctx.token}'} if ctx.token else {}
+    response = ctx.session.get(
+        f"{repo_url}/git/trees/{quote(tree_sha or ref, safe='/')}",
+        params={"recursive": "1"},
+        headers=headers
+    )
+    # Empty repositories have no tree (409) or no default branch yet (404)
+    if response.status_code in (404, 409):
+        return None
+    response.raise_for_status()
+    tree = response.json()
+    if previous and previous["tree"] == tree["sha"]:
+        metrics.count("stacks_reused")
+        return previous
+    
+    tools, frameworks, manifests = plan(tree["tree"], MANIFEST_MAX_BYTES, MAX_MANIFESTS)
+    for path, sha, kind in manifests:
+        # Blobs are immutable, so the conditional cache serves repeats
+        blob = ctx.session.get(f"{repo_url}/git/blobs/{sha}", headers=dict(headers, Accept="application/vnd.github.raw"))
+        blob.raise_for_status()
+        found_tools, found_frameworks = parse_manifest(kind, blob.content.decode("utf-8", errors="replace"))
+        tools.update(found_tools)
+        frameworks.update(found_frameworks)
+    metrics.count("manifests_fetched", len(manifests))
+    
+    return {"tree": tree["sha"], "tools": sorted(tools), "frameworks": sorted(frameworks)}
+
+def fetch_repo_data(repo, previous_stack=None):
+    """Fetch languages, topics, manifests and a README stream for a single repository
+    
+    The README is streamed while keywords are scanned, so it has to be
+    consumed before the next repository is fetched on this thread.
+    """
+    languages = repo.get_languages()
+    topics = repo.get_topics()
+    
+    # Stack detection and README are optional; a failure skips them for this
+    # run and the repository is retried on the next one
+    complete = True
+    try:
+        stack = detect_stack(repo.url, repo.default_branch, previous_stack)
+    except Exception as e:
+        print(f"Error detecting stack of repo {repo.name}: {e}")
+        stack = None
+        complete = False
+    
+    # README is optional; a missing one only skips keyword detection
+    try:
+        readme = open_readme(f"{repo.url}/readme", repo.full_name)
+    except Exception as e:
+        print(f"Error processing repo {repo.name}: {e}")
+        readme = None
+        # Anything but a 404 is worth retrying on the next run
+        complete = False
+    
+    return {
+        "name": repo.name,
+        "description": repo.description or "",
+        "stars": repo.stargazers_count,
+        "forks": repo.forks_count,
+        # PyGithub injects the request "url" into dict payloads
+        "languages": {
+            lang: bytes_count for lang, bytes_count in languages.items()
+            if isinstance(bytes_count, int)
+        },
+        "topics": list(topics),
+        "readme": readme,
+        "stack": stack,
+        "complete": complete
+    }
+
+# README paths tried by the GraphQL backend, in the order GitHub prefers them
+README_PATHS = ["README.md", "readme.md", "Readme.md", "README", "README.rst", "README.txt"]
+
+REPOSITORIES_QUERY = """
+query($login: String!, $first: Int!, $cursor: String) {
+  user(login: $login) {
+    repositories(first: $first, after: $cursor, ownerAffiliations: OWNER, privacy: PUBLIC, orderBy: {field: PUSHED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        databaseId
+        name
+        description
+        isFork
+        pushedAt
+        updatedAt
+        stargazerCount
+        forkCount
+        defaultBranchRef { name target { ... on Commit { tree { oid } } } }
+        repositoryTopics(first: 100) { nodes { topic { name } } }
+        languages(first: 100) { edges { size node { name } } }
+%s
+      }
+    }
+  }
+}
+""" % "\n".join(
+    f'        readme{i}: object(expression: "HEAD:{path}") {{ ... on Blob {{ text }} }}'
+    for i, path in enumerate(README_PATHS)
+)
+
+def fetch_repos_graphql(username):
+    """Fetch repository data for all of a user's repositories via GraphQL"""
+    ctx = get_context()
+    headers = {'Authorization': f'bearer {ctx.token}'} if ctx.token else {}
+    cursor = None
+    
+    while True:
+        response = ctx.session.post(GRAPHQL_URL, headers=headers, json={
+            "query": REPOSITORIES_QUERY,
+            "variables": {"login": username, "first": GRAPHQL_PAGE_SIZE, "cursor": cursor}
+        })
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get("errors"):
+            raise RuntimeError(f"GraphQL error: {payload['errors'][0].get('message')}")
         
-        # Get repositories
-        repos = user.get_repos()
+        repositories = payload["data"]["user"]["repositories"]
+        for node in repositories["nodes"]:
+            if node["name"] in EXCLUDE_REPOS or node["isFork"]:
+                continue
+            
+            # First README variant that exists wins, like the REST readme endpoint
+            readme = None
+            for i in range(len(README_PATHS)):
+                blob = node.get(f"readme{i}")
+                if blob and blob.get("text") is not None:
+                    readme = blob["text"]
+                    break
+            # Blobs arrive whole; apply the same byte cap as the streamed REST
+            # fetch, decoding a cut-off character the same way
+            if readme is not None and len(readme.encode("utf-8")) > README_MAX_BYTES:
+                readme = readme.encode("utf-8")[:README_MAX_BYTES].decode("utf-8", errors="replace")
+                get_context().metrics.limit_reached("readme_bytes", README_MAX_BYTES, f"{username}/{node['name']}")
+            
+            # Empty repositories have no default branch
+            branch = node.get("defaultBranchRef") or {}
+            yield {
+                "id": node["databaseId"],
+                "pushed_at": node["pushedAt"],
+                "default_branch": branch.get("name"),
+                "tree_sha": ((branch.get("target") or {}).get("tree") or {}).get("oid"),
+                "updated_at": node["updatedAt"],
+                "name": node["name"],
+                "description": node["description"] or "",
+                "stars": node["stargazerCount"],
+                "forks": node["forkCount"],
+                "languages": {
+                    edge["node"]["name"]: edge["size"]
+                    for edge in node["languages"]["edges"]
+                },
+                "topics": [
+                    topic_node["topic"]["name"]
+                    for topic_node in node["repositoryTopics"]["nodes"]
+                ],
+                "readme": readme,
+                "complete": True
+            }
         
-        # Collect repository languages
-        lang_stats = Counter()
-        tools_detected = set()
-        frameworks_detected = set()
+        if not repositories["pageInfo"]["hasNextPage"]:
+            break
+        cursor = repositories["pageInfo"]["endCursor"]
+
+def build_repo_record(repo_data):
+    """Detect categories, tools and frameworks for fetched repository data"""
+    categories = []
+    tools = set()
+    frameworks = set()
+    
+    readme_content = repo_data["readme"]
+    if readme_content is not None:
+        # Categories use description, README, name and topics; tools and
+        # frameworks only description and README. A streamed README is
+        # scanned chunk by chunk as it downloads, so for the REST backend
+        # this phase includes the README transfer.
+        with get_context().metrics.phase("keyword_scan"):
+            categories, tools, frameworks = get_keyword_matcher().scan(
+                repo_data["description"].lower(),
+                readme_content,
+                repo_data["name"].lower(),
+                repo_data["topics"]
+            )
+    
+    # Manifests name tools and frameworks more reliably than prose
+    stack = repo_data.get("stack")
+    if stack:
+        tools.update(stack["tools"])
+        frameworks.update(stack["frameworks"])
+    
+    return {
+        "name": repo_data["name"],
+        "stars": repo_data["stars"],
+        "forks": repo_data["forks"],
+        "languages": repo_data["languages"],
+        "topics": repo_data["topics"],
+        "categories": categories,
+        # Keyword and manifest detection agree on the badge registry's names
+        "tools": sorted({canonical_badge_name(tool) for tool in tools}),
+        "frameworks": sorted({canonical_badge_name(framework) for framework in frameworks}),
+        "stack": stack,
+        "complete": repo_data["complete"]
+    }
+
+def repo_stamp(pushed_at, updated_at):
+    """Build the change marker stored with a repository record"""
+    def fmt(value):
+        if isinstance(value, datetime):
+            return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+        return value or ""
+    return f"{fmt(pushed_at)}|{fmt(updated_at)}"
+
+def shard_label(shard):
+    """Name a shard for file names, e.g. shard-2-of-4"""
+    index, count = shard
+    return f"shard-{index}-of-{count}"
+
+def shard_of(repo_id, count):
+    """Assign a repository to one of count shards
+
+    Uses a stable digest of the id (the built-in hash() of a str is salted
+    per process), so every process and CI job agrees on the assignment.
+    """
+    digest = hashlib.sha1(str(repo_id).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+def in_shard(repo_id, shard):
+    """Check whether a repository belongs to shard (None means all)"""
+    return shard is None or shard_of(repo_id, shard[1]) == shard[0]
+
+def repo_store_path(username, shard=None):
+    """Path of the per-repository record store; each shard keeps its own"""
+    name = f"repos-{username}.json" if shard is None else f"repos-{username}.{shard_label(shard)}.json"
+    return os.path.join(STATE_DIR, name)
+
+def load_repo_store(username, shard=None):
+    """Load stored per-repository records keyed by repository id"""
+    path = repo_store_path(username, shard)
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    # Records from an older detector are recomputed rather than trusted
+    if data.get("version") != RECORD_VERSION:
+        return {}
+    return data.get("repos", {})
+
+def save_repo_store(username, repos, shard=None):
+    """Persist per-repository records for the next run"""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    path = repo_store_path(username, shard)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": RECORD_VERSION, "repos": repos}, f)
+    os.replace(tmp_path, path)
+
+def checkpoint_path(username, shard=None):
+    """Path of the checkpoint of records finished by an interrupted run"""
+    name = f"checkpoint-{username}.jsonl" if shard is None else f"checkpoint-{username}.{shard_label(shard)}.jsonl"
+    return os.path.join(STATE_DIR, name)
+
+class RepoCheckpoint:
+    """Append-only log of repository records finished during this run
+    
+    Every record is flushed as soon as it is analyzed, so a run that dies
+    halfway (a failed page, a killed job) loses nothing; the next run
+    replays the log over the store and resumes. The log is removed once
+    the store itself has been saved.
+    """
+    
+    def __init__(self, username, shard=None):
+        self.path = checkpoint_path(username, shard)
+        self.lock = threading.Lock()
+        self.file = None
+    
+    def load(self):
+        """Get the entries of an interrupted run, keyed by repository id"""
+        entries = {}
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # The last line of a killed run may be cut short
+                        break
+                    if entry.get("version") == RECORD_VERSION:
+                        entries[entry["id"]] = {"stamp": entry["stamp"], "record": entry["record"]}
+        except OSError:
+            pass
+        return entries
+    
+    def append(self, repo_id, stamp, record):
+        """Persist one finished record"""
+        line = json.dumps({"version": RECORD_VERSION, "id": str(repo_id), "stamp": stamp, "record": record})
+        with self.lock:
+            if self.file is None:
+                os.makedirs(STATE_DIR, exist_ok=True)
+                self.file = open(self.path, "a")
+            self.file.write(line + "\n")
+            self.file.flush()
+    
+    def clear(self):
+        """Drop the log after its records made it into the store"""
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+class RunBudget:
+    """Time and request limits for analyzing repositories in one run"""
+    
+    def __init__(self, scheduler, seconds=RUN_TIME_BUDGET, requests=RUN_REQUEST_BUDGET):
+        self.scheduler = scheduler
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.requests = requests
+        self.start_requests = scheduler.stats["requests"]
+    
+    def exhausted(self):
+        """Describe the spent budget, or None while there is budget left"""
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return "time budget"
+        if self.requests and self.scheduler.stats["requests"] - self.start_requests >= self.requests:
+            return "request budget"
+        return None
+
+def reuse_record(store, repo_id, stamp, name, stars, forks):
+    """Return the stored record for an unchanged repository, or None"""
+    entry = store.get(str(repo_id))
+    if not entry or entry["stamp"] != stamp or not entry["record"].get("complete", True):
+        return None
+    # Counts and name come from the listing, which is fetched anyway
+    return dict(entry["record"], name=name, stars=stars, forks=forks)
+
+def previous_stack(store, repo_id):
+    """Get the stack stored with a repository's last record, if any"""
+    entry = store.get(str(repo_id))
+    return entry["record"].get("stack") if entry else None
+
+def analyze_repo(repo, previous_stack=None):
+    """Fetch and analyze a single repository (runs in a worker thread)"""
+    with get_context().metrics.phase("fetch_repo", repo=repo.name):
+        repo_data = fetch_repo_data(repo, previous_stack)
+    return build_repo_record(repo_data)
+
+def analyze_graphql_repo(data, repo_url, previous_stack=None):
+    """Detect the stack of a repository listed by GraphQL and build its
+    record (runs in a worker thread)"""
+    data["stack"] = None
+    if data["default_branch"]:
+        try:
+            data["stack"] = detect_stack(repo_url, data["default_branch"], previous_stack, data["tree_sha"])
+        except Exception as e:
+            print(f"Error detecting stack of repo {data['name']}: {e}")
+            data["complete"] = False
+    return build_repo_record(data)
+
+def partial_from_records(records, incomplete=False):
+    """Fold per-repository records into a serializable partial result
+    
+    Partial results hold only sums, counts and sets, so partials of
+    disjoint sets of repositories can be merged in any order. incomplete
+    marks results that are missing repositories or use stale records.
+    """
+    # Collect repository languages
+    lang_stats = Counter()
+    tools_detected = set()
+    frameworks_detected = set()
+    
+    # Project categories and topics
+    project_categories = Counter()
+    topics_counter = Counter()
+    
+    # Repository statistics
+    total_stars = 0
+    total_forks = 0
+    total_repos = 0
+    
+    for record in records:
+        total_repos += 1
+        total_stars += record["stars"]
+        total_forks += record["forks"]
         
-        # Project categories and topics
-        project_categories = Counter()
-        topics_counter = Counter()
+        for lang, bytes_count in record["languages"].items():
+            if lang not in EXCLUDE_LANGS:
+                lang_stats[lang] += bytes_count
         
-        # Repository statistics
-        total_stars = 0
-        total_forks = 0
-        total_repos = 0
+        for topic in record["topics"]:
+            topics_counter[topic] += 1
         
-        # Category detection keywords
-        category_keywords = {
-            "Web Development": ["web", "website", "frontend", "backend", "fullstack", "react", "vue", "angular", "node", "express", "django", "flask", "html", "css", "javascript"],
-            "Data Science": ["data", "analysis", "analytics", "visualization", "machine learning", "ml", "ai", "artificial intelligence", "pandas", "numpy", "jupyter", "tensorflow", "pytorch"],
-            "Mobile Apps": ["mobile", "android", "ios", "app", "flutter", "react native", "swift", "kotlin"],
-            "Desktop Applications": ["desktop", "gui", "ui", "electron", "qt", "gtk", "wxwidgets"],
-            "DevOps": ["devops", "ci/cd", "pipeline", "automation", "kubernetes", "docker", "container", "jenkins", "github actions"],
-            "Game Development": ["game", "unity", "unreal", "godot", "pygame"],
-            "IoT": ["iot", "internet of things", "raspberry pi", "arduino", "embedded"],
-            "Blockchain": ["blockchain", "crypto", "web3", "ethereum", "smart contract", "solidity"],
-            "API": ["api", "rest", "graphql", "microservice"],
-            "Security": ["security", "cybersecurity", "encryption", "authentication", "authorization"],
-            "Automation": ["automation", "bot", "script", "scraper", "crawler"],
-            "Education": ["education", "learning", "tutorial", "course"],
-            "Documentation": ["documentation", "docs", "wiki"],
-            "Open Source": ["open source", "community", "contribution"]
-        }
+        for category in record["categories"]:
+            project_categories[category] += 1
         
-        for repo in repos:
-            if repo.name in EXCLUDE_REPOS or repo.fork:
-                continue
-            
-            total_repos += 1
-            total_stars += repo.stargazers_count
-            total_forks += repo.forks_count
-            
-            # Get languages used in this repository
-            languages = repo.get_languages()
-            for lang, bytes_count in languages.items():
-                if lang not in EXCLUDE_LANGS:
-                    lang_stats[lang] += bytes_count
-            
-            # Get topics from repository
-            repo_topics = repo.get_topics()
-            for topic in repo_topics:
-                topics_counter[topic] += 1
-            
-            # Check README and description for tools/frameworks and categories
+        tools_detected.update(record["tools"])
+        frameworks_detected.update(record["frameworks"])
+    
+    return {
+        "repos": total_repos,
+        "stars": total_stars,
+        "forks": total_forks,
+        "languages": dict(lang_stats),
+        "topics": dict(topics_counter),
+        "categories": dict(project_categories),
+        "tools": sorted(tools_detected),
+        "frameworks": sorted(frameworks_detected),
+        "incomplete": incomplete
+    }
+
+def merge_partials(partials):
+    """Combine partial results of disjoint repository sets into one"""
+    lang_stats = Counter()
+    topics_counter = Counter()
+    project_categories = Counter()
+    tools_detected = set()
+    frameworks_detected = set()
+    totals = {"repos": 0, "stars": 0, "forks": 0}
+    incomplete = False
+    
+    for partial in partials:
+        incomplete = incomplete or partial.get("incomplete", False)
+        for key in totals:
+            totals[key] += partial[key]
+        lang_stats.update(partial["languages"])
+        topics_counter.update(partial["topics"])
+        project_categories.update(partial["categories"])
+        tools_detected.update(partial["tools"])
+        frameworks_detected.update(partial["frameworks"])
+    
+    return dict(
+        totals,
+        languages=dict(lang_stats),
+        topics=dict(topics_counter),
+        categories=dict(project_categories),
+        tools=sorted(tools_detected),
+        frameworks=sorted(frameworks_detected),
+        incomplete=incomplete
+    )
+
+def rank(counts):
+    """Sort (name, count) pairs by count, breaking ties by name
+    
+    The tie-break keeps the result independent of the order in which
+    repositories (or shards) were folded in.
+    """
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+
+def finalize_partial(partial):
+    """Turn a (merged) partial result into the final analysis dict"""
+    return {
+        "languages": rank(partial["languages"])[:MAX_LANG_DISPLAY],
+        "tools": list(partial["tools"]),
+        "frameworks": list(partial["frameworks"]),
+        # Most common project categories and topics
+        "project_categories": dict(rank(partial["categories"])[:5]),
+        "topics": [topic for topic, count in rank(partial["topics"])[:8]],
+        "stats": {
+            "total_repos": partial["repos"],
+            "total_stars": partial["stars"],
+            "total_forks": partial["forks"]
+        },
+        "partial": partial.get("incomplete", False)
+    }
+
+def aggregate_repo_records(records):
+    """Combine per-repository records into the final analysis dict"""
+    return finalize_partial(partial_from_records(records))
+
+def analyze_partial(username=None):
+    """Analyze the repositories of the context's shard into a partial result
+    
+    Records are checkpointed as they finish. Changed repositories are
+    analyzed most recently pushed first until RUN_TIME_BUDGET or
+    RUN_REQUEST_BUDGET runs out; if the budget runs out or an API call
+    fails, the repositories that were not analyzed keep their last stored
+    record (if any) and the result is marked incomplete. Raises only when
+    there is no real data at all.
+    """
+    ctx = get_context()
+    username = username or ctx.username
+    shard = ctx.shard
+    metrics = ctx.metrics
+    budget = RunBudget(ctx.scheduler)
+    
+    checkpoint = RepoCheckpoint(username, shard)
+    store = load_repo_store(username, shard)
+    resumed = checkpoint.load()
+    if resumed:
+        print(f"Resuming from checkpoint with {len(resumed)} analyzed repositories")
+        store.update(resumed)
+    
+    # id -> stamp and record of every repository in this run's result
+    entries = {}
+    # Repositories that keep their stored record instead of a fresh one
+    stale_ids = set()
+    listing_complete = True
+    error = None
+    
+    def add_record(repo_id, stamp, record):
+        entries[str(repo_id)] = {"stamp": stamp, "record": record}
+        checkpoint.append(repo_id, stamp, record)
+    
+    if DATA_BACKEND == "graphql":
+        # One request per page of repositories instead of three per repo;
+        # pages arrive most recently pushed first. Stack detection still
+        # needs REST requests per changed repository, so it runs on the
+        # worker pool while the next pages are read.
+        pending = {}
+        # id -> listing data of repositories whose analysis failed
+        failed = {}
+                    
+        def collect(block):
+            """Record finished repositories; with block, wait for at least one"""
+            nonlocal error
+            if block:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            else:
+                done = [future for future in pending if future.done()]
+            for future in done:
+                data, stamp = pending.pop(future)
+                try:
+                    add_record(data["id"], stamp, future.result())
+                    metrics.count("repos_analyzed")
+                except Exception as e:
+                    print(f"Error analyzing repo {data['name']}: {e}")
+                    metrics.count("repos_failed")
+                    error = e
+                    stale_ids.add(str(data["id"]))
+                    failed[str(data["id"])] = data
+    
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
             try:
-                readme_content = repo.get_readme().decoded_content.decode('utf-8').lower()
-                description = (repo.description or "").lower()
-                repo_name = repo.name.lower()
-                
-                # Combine all text data for category analysis
-                all_text = f"{description} {readme_content} {repo_name} {' '.join(repo_topics)}"
-                
-                # Detect project categories
-                for category, keywords in category_keywords.items():
-                    for keyword in keywords:
-                        if keyword in all_text:
-                            project_categories[category] += 1
-                            break
-                
-                # Check for common frameworks and tools in README and description
-                for keyword, category in [
-                    ("docker", "tools"),
-                    ("kubernetes", "tools"),
-                    ("django", "frameworks"),
-                    ("flask", "frameworks"),
-                    ("react", "frameworks"),
-                    ("vue", "frameworks"),
-                    ("angular", "frameworks"),
-                    ("node", "frameworks"),
-                    ("express", "frameworks"),
-                    ("aws", "tools"),
-                    ("azure", "tools"),
-                    ("gcp", "tools"),
-                    ("terraform", "tools"),
-                    ("ansible", "tools"),
-                    ("jenkins", "tools"),
-                    ("github actions", "tools"),
-                    ("postgresql", "databases"),
-                    ("mysql", "databases"),
-                    ("mongodb", "databases"),
-                    ("redis", "databases"),
-                    ("sqlite", "databases")
-                ]:
-                    if keyword in readme_content or keyword in description:
-                        if category == "tools":
-                            tools_detected.add(keyword.title())
+                with metrics.phase("fetch_graphql"):
+                    for data in fetch_repos_graphql(username):
+                        if not in_shard(data["id"], shard):
+                            continue
+                        stamp = repo_stamp(data["pushed_at"], data["updated_at"])
+                        record = reuse_record(store, data["id"], stamp, data["name"], data["stars"], data["forks"])
+                        if record is None:
+                            repo_url = f"{API_URL}/repos/{username}/{quote(data['name'])}"
+                            future = executor.submit(analyze_graphql_repo, data, repo_url, previous_stack(store, data["id"]))
+                            pending[future] = (data, stamp)
                         else:
-                            frameworks_detected.add(keyword.title())
+                            entries[str(data["id"])] = {"stamp": stamp, "record": record}
+                            metrics.count("repos_reused")
+    
+                        # Bound the READMEs held in memory by queued repositories
+                        collect(block=len(pending) >= 2 * MAX_WORKERS)
+                        reason = budget.exhausted()
+                        if reason:
+                            print(f"{reason.capitalize()} spent after {len(entries) + len(pending)} repositories")
+                            listing_complete = False
+                            break
             except Exception as e:
-                # Skip if README can't be fetched
-                print(f"Error processing repo {repo.name}: {e}")
-                pass
-            
-        # Sort languages by usage
-        top_languages = sorted(lang_stats.items(), key=lambda x: x[1], reverse=True)
+                print(f"Error fetching repositories: {e}")
+                error = e
+                listing_complete = False
+            while pending:
+                collect(block=True)
+    
+        # Failed repositories keep their previous record, with live counts
+        for repo_id in stale_ids:
+            entry = store.get(repo_id)
+            if entry is not None:
+                data = failed[repo_id]
+                entries[repo_id] = dict(
+                    entry, record=dict(entry["record"], name=data["name"], stars=data["stars"], forks=data["forks"])
+                )
+    else:
+        repos = []
+        try:
+            with metrics.phase("list_repos"):
+                user = ctx.github.get_user(username)
+                
+                # Get repositories; every shard lists all of them and keeps its own
+                for repo in user.get_repos():
+                    if repo.name not in EXCLUDE_REPOS and not repo.fork and in_shard(repo.id, shard):
+                        repos.append(repo)
+        except Exception as e:
+            # Keep what was listed; the rest comes from stored records
+            print(f"Error listing repositories after {len(repos)}: {e}")
+            error = e
+            listing_complete = False
         
-        # Get most common project categories
-        top_categories = dict(project_categories.most_common(5))
+        # Reuse stored records for repositories untouched since the last run
+        changed = []
+        for repo in repos:
+            stamp = repo_stamp(repo.pushed_at, repo.updated_at)
+            record = reuse_record(store, repo.id, stamp, repo.name, repo.stargazers_count, repo.forks_count)
+            if record is None:
+                changed.append((repo, stamp))
+            else:
+                entries[str(repo.id)] = {"stamp": stamp, "record": record}
+        print(f"Analyzing {len(changed)} changed of {len(repos)} repositories")
+        metrics.count("repos_reused", len(repos) - len(changed))
         
-        # Get most common topics
-        top_topics = [topic for topic, count in topics_counter.most_common(8)]
+        # Most recently pushed first (stamps start with pushed_at), so a
+        # spent budget skips the stalest ones
+        changed.sort(key=lambda item: item[1], reverse=True)
         
-        return {
-            "languages": top_languages[:MAX_LANG_DISPLAY],
-            "tools": sorted(list(tools_detected)),
-            "frameworks": sorted(list(frameworks_detected)),
-            "project_categories": top_categories,
-            "topics": top_topics,
-            "stats": {
-                "total_repos": total_repos,
-                "total_stars": total_stars,
-                "total_forks": total_forks
-            }
-        }
-    except Exception as e:
-        print(f"Error accessing GitHub API: {e}")
-        # Return sample data as fallback
-        print("Falling back to sample data")
+        # Fan the per-repo API calls out over a bounded worker pool, handing
+        # out work only while there is budget left
+        queue = iter(changed)
+        pending = {}
+        submitted = 0
+        stopped = False
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            while True:
+                while not stopped and len(pending) < MAX_WORKERS:
+                    reason = budget.exhausted()
+                    if reason:
+                        print(f"{reason.capitalize()} spent, skipping {len(changed) - submitted} changed repositories")
+                        metrics.count("repos_skipped", len(changed) - submitted)
+                        stopped = True
+                        break
+                    item = next(queue, None)
+                    if item is None:
+                        break
+                    repo = item[0]
+                    pending[executor.submit(analyze_repo, repo, previous_stack(store, repo.id))] = item
+                    submitted += 1
+                if not pending:
+                    break
+                
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    repo, stamp = pending.pop(future)
+                    try:
+                        add_record(repo.id, stamp, future.result())
+                        metrics.count("repos_analyzed")
+                    except Exception as e:
+                        # One failing repository costs only its own record
+                        print(f"Error analyzing repo {repo.name}: {e}")
+                        metrics.count("repos_failed")
+                        error = e
+                        stale_ids.add(str(repo.id))
+        
+        # Skipped repositories keep their previous record, with live counts
+        listed = {str(repo.id): repo for repo in repos}
+        stale_ids.update(repo_id for repo_id in listed if repo_id not in entries)
+        for repo_id in stale_ids:
+            entry = store.get(repo_id)
+            if entry is not None:
+                repo = listed[repo_id]
+                entries[repo_id] = dict(
+                    entry, record=dict(entry["record"], name=repo.name, stars=repo.stargazers_count, forks=repo.forks_count)
+                )
+    
+    # An unfinished listing says nothing about the repositories it did not
+    # reach, so their stored records stand in for them (unless excluded
+    # since they were stored)
+    if not listing_complete:
+        for repo_id, entry in store.items():
+            if repo_id not in entries and entry["record"]["name"] not in EXCLUDE_REPOS:
+                entries[repo_id] = entry
+                stale_ids.add(repo_id)
+    
+    incomplete = not listing_complete or bool(stale_ids)
+    if incomplete:
+        metrics.count("repos_stale", sum(1 for repo_id in stale_ids if repo_id in entries))
+    if not entries and error is not None:
+        raise RuntimeError(f"No repository data available: {error}")
+    
+    # Stale entries keep their old stamps, so they are retried next run
+    save_repo_store(username, entries, shard)
+    checkpoint.clear()
+    
+    with metrics.phase("aggregate"):
+        return partial_from_records([entry["record"] for entry in entries.values()], incomplete)
+
+def analyze_repositories(username=None):
+    """Analyze repositories to determine the technology stack
+    
+    Sample data is only used in test mode; API failures yield whatever
+    real data was gathered, flagged with "partial".
+    """
+    ctx = get_context()
+    
+    # Use sample data when in test mode
+    if ctx.test_mode:
+        print("Running in test mode with sample data")
         return get_sample_repo_data()
+    
+    return finalize_partial(analyze_partial(username))
+
+def analyze_shard(username, index, count):
+    """Analyze one shard in a worker process
+    
+    Returns its partial result and its exported metrics, which would
+    otherwise be lost with the process.
+    """
+    set_context(Context(shard=(index, count)))
+    ctx = get_context()
+    try:
+        partial = analyze_partial(username)
+    finally:
+        ctx.finish()
+    return partial, ctx.metrics.export(ctx._values.get("http_cache"), ctx._values.get("scheduler"))
+
+def analyze_sharded(username, processes):
+    """Analyze a user's repositories in processes worker processes
+    
+    Each worker handles one hash shard of the repositories; the partial
+    results are merged into the same analysis a single process produces.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    
+    # spawn: forked children would inherit the parent's sockets and locks
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=mp_context) as executor:
+        results = list(executor.map(analyze_shard, [username] * processes, range(processes), [processes] * processes))
+    
+    metrics = get_context().metrics
+    for index, (partial, state) in enumerate(results):
+        metrics.merge(state, shard_label((index, processes)))
+    return finalize_partial(merge_partials(partial for partial, state in results))
+
+def write_partial(path, username, shard, partial):
+    """Write a shard's partial result for a later --reduce"""
+    with open(path, "w") as f:
+        json.dump({"version": PARTIAL_VERSION, "username": username, "shard": list(shard), "partial": partial}, f, sort_keys=True)
+
+def load_partials(paths):
+    """Load shard files and check they are one complete set
+    
+    Returns the username and the merged partial result.
+    """
+    shards = {}
+    usernames = set()
+    counts = set()
+    for path in paths:
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") != PARTIAL_VERSION:
+            raise SystemExit(f"{path}: unsupported partial result version {data.get('version')}")
+        index, count = data["shard"]
+        if index in shards:
+            raise SystemExit(f"{path}: shard {index} of {count} given twice")
+        shards[index] = data["partial"]
+        usernames.add(data["username"])
+        counts.add(count)
+    
+    if len(usernames) != 1 or len(counts) != 1:
+        raise SystemExit("Partial results must come from one user and one shard count")
+    count = counts.pop()
+    missing = sorted(set(range(count)) - set(shards))
+    if missing:
+        raise SystemExit(f"Missing shards {missing} of {count}")
+    return usernames.pop(), merge_partials(shards[index] for index in range(count))
 
 def get_sample_user_stats():
     """Get sample user statistics for testing"""
@@ -323,30 +1236,58 @@ def get_sample_user_stats():
         "created_at": "2020-01-01T00:00:00Z"
     }
 
-def get_contribution_stats():
-    """Get contribution statistics for the user"""
+def user_stats_path(username):
+    """Path of the user statistics saved by the last successful run"""
+    return os.path.join(STATE_DIR, f"user-{username}.json")
+
+def load_user_stats(username):
+    """Load the last successfully fetched user statistics, or None"""
+    try:
+        with open(user_stats_path(username), "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def save_user_stats(username, stats):
+    """Remember user statistics as a fallback for failed runs"""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    path = user_stats_path(username)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(stats, f)
+    os.replace(tmp_path, path)
+
+def get_contribution_stats(username=None):
+    """Get contribution statistics for the user
+    
+    When the API fails, the statistics of the last successful run are
+    used; without those the error is raised rather than publishing
+    sample numbers.
+    """
+    ctx = get_context()
+    username = username or ctx.username
+    
     # Use sample data in test mode
-    if TEST_MODE:
+    if ctx.test_mode:
         print("Using sample user statistics")
         return get_sample_user_stats()
     
     try:
         # Use GitHub API to get contribution data
-        headers = {'Authorization': f'token {TOKEN}'} if TOKEN else {}
+        headers = {'Authorization': f'token {ctx.token}'} if ctx.token else {}
         
         # Get user information
-        response = requests.get(f"{API_URL}/users/{USERNAME}", headers=headers)
+        response = ctx.session.get(f"{API_URL}/users/{username}", headers=headers)
         
         if response.status_code != 200:
-            print(f"API error: {response.status_code}")
-            return get_sample_user_stats()
+            raise RuntimeError(f"API error: {response.status_code}")
             
         user_data = response.json()
         
         # We can't directly get contribution count from API, but we can note account creation date
         created_at = user_data.get('created_at', '')
         
-        return {
+        stats = {
             "public_repos": user_data.get('public_repos', 0),
             "followers": user_data.get('followers', 0),
             "following": user_data.get('following', 0),
@@ -354,59 +1295,29 @@ def get_contribution_stats():
         }
     except Exception as e:
         print(f"Error accessing GitHub API for user stats: {e}")
-        return get_sample_user_stats()
-
-def generate_readme(analysis, stats):
-    """Generate the README.md content"""
-    now = datetime.now()
-    
-    # Introduction with animated header based on top category
-    def get_category_animation(categories):
-        """Get animated SVG header based on top project category"""
-        if not categories:
-            return """<div align="center">
-  <img src="https://readme-typing-svg.herokuapp.com?font=Fira+Code&size=24&duration=4000&pause=1000&color=36BCF7FF&center=true&width=600&background=00000000&lines=Welcome+to+my+GitHub+Profile;I'm+a+Developer;Passionate+about+coding;Creating+innovative+solutions" alt="Typing SVG" />
-</div>"""
-        
-        # Get top category
-        top_category = list(categories.keys())[0] if categories else "Web Development"
-        
-        # Generate custom typing animation with category
-        return f"""<div align="center">
-  <img src="https://readme-typing-svg.herokuapp.com?font=Fira+Code&size=24&duration=4000&pause=1000&color=36BCF7FF&center=true&width=600&background=00000000&lines=Welcome+to+my+GitHub+Profile;I'm+a+{top_category.replace(' ', '+')}+Developer;Passionate+about+coding;Building+{top_category.replace(' ', '+')}+solutions" alt="Typing SVG" />
-</div>"""
+        stats = load_user_stats(username)
+        if stats is None:
+            raise
+        print("Using user statistics from the last successful run")
+        return stats
     
-    # Get header with animated typing
-    category_header = get_category_animation(analysis.get("project_categories", {}))
-    
-    readme = f"""
-{category_header}
+    save_user_stats(username, stats)
+    return stats
+
+# Typing animation header; $lines is the ;-separated list of lines
+HEADER_TEMPLATE = Template("""<div align="center">
+  <img src="https://readme-typing-svg.herokuapp.com?font=Fira+Code&size=24&duration=4000&pause=1000&color=36BCF7FF&center=true&width=600&background=00000000&lines=$lines" alt="Typing SVG" />
+</div>""")
 
-# Hi there 👋, I'm {USERNAME}
+# Whole document, compiled once; sections are pre-rendered strings
+README_TEMPLATE = Template("""
+$header
+
+# Hi there 👋, I'm $username
 
 This is my automatically updated GitHub profile that shows my tech stack based on my repository activity.
 
-"""
-    
-    # Add project focus section if categories are available
-    if "project_categories" in analysis and analysis["project_categories"]:
-        readme += "## 🚀 What I Work On\n\n"
-        readme += "My GitHub repositories focus on these areas:\n\n"
-        
-        # Add bullet points for each project category with count
-        for category, count in analysis["project_categories"].items():
-            readme += f"- **{category}** ({count} repos)\n"
-        
-        # Add common topics/tags if available
-        if "topics" in analysis and analysis["topics"]:
-            readme += "\n**Common topics:** "
-            for topic in analysis["topics"]:
-                readme += f"`#{topic}` "
-        
-        readme += "\n"
-    
-    # Tech stack section with animated separator
-    readme += """
+$focus_section
 ## 🛠️ My Tech Stack
 
 <div align="center">
@@ -415,25 +1326,7 @@ This is my automatically updated GitHub profile that shows my tech stack based o
 
 ### Languages I Use
     
-"""
-    # Add language badges
-    for lang, bytes_count in analysis["languages"]:
-        readme += f"{get_language_badge(lang)} "
-    
-    # Add frameworks if detected
-    if analysis["frameworks"]:
-        readme += "\n\n### Frameworks & Libraries\n\n"
-        for framework in analysis["frameworks"]:
-            readme += f"{get_tool_badge(framework)} "
-    
-    # Add tools if detected
-    if analysis["tools"]:
-        readme += "\n\n### Tools & Technologies\n\n"
-        for tool in analysis["tools"]:
-            readme += f"{get_tool_badge(tool)} "
-    
-    # Add statistics with animated elements
-    readme += f"""
+$language_badges$frameworks_section$tools_section
 
 ## 📊 GitHub Stats
 
@@ -446,30 +1339,30 @@ This is my automatically updated GitHub profile that shows my tech stack based o
       <td><b>👥 Followers</b></td>
     </tr>
     <tr>
-      <td><img alt="Repositories" src="https://img.shields.io/badge/{analysis["stats"]["total_repos"]}-4c71f2?style=for-the-badge&logo=github&logoColor=white"/></td>
-      <td><img alt="Stars" src="https://img.shields.io/badge/{analysis["stats"]["total_stars"]}-FFD700?style=for-the-badge&logo=github&logoColor=white"/></td>
-      <td><img alt="Forks" src="https://img.shields.io/badge/{analysis["stats"]["total_forks"]}-4c71f2?style=for-the-badge&logo=github&logoColor=white"/></td>
-      <td><img alt="Followers" src="https://img.shields.io/badge/{stats["followers"]}-FFD700?style=for-the-badge&logo=github&logoColor=white"/></td>
+      <td><img alt="Repositories" src="https://img.shields.io/badge/$total_repos-4c71f2?style=for-the-badge&logo=github&logoColor=white"/></td>
+      <td><img alt="Stars" src="https://img.shields.io/badge/$total_stars-FFD700?style=for-the-badge&logo=github&logoColor=white"/></td>
+      <td><img alt="Forks" src="https://img.shields.io/badge/$total_forks-4c71f2?style=for-the-badge&logo=github&logoColor=white"/></td>
+      <td><img alt="Followers" src="https://img.shields.io/badge/$followers-FFD700?style=for-the-badge&logo=github&logoColor=white"/></td>
     </tr>
   </table>
 </div>
-
+$trends_section
 <div align="center">
-  <img src="https://github-readme-stats.vercel.app/api?username={USERNAME}&show_icons=true&theme=radical" alt="GitHub stats" />
+  <img src="https://github-readme-stats.vercel.app/api?username=$username&show_icons=true&theme=radical" alt="GitHub stats" />
 </div>
 
 <div align="center">
-  <img src="https://github-readme-stats.vercel.app/api/top-langs/?username={USERNAME}&layout=compact&theme=radical" alt="Top Languages" />
+  <img src="https://github-readme-stats.vercel.app/api/top-langs/?username=$username&layout=compact&theme=radical" alt="Top Languages" />
 </div>
 
 ## 📈 Activity
 
 <div align="center">
-  <img src="https://github-profile-trophy.vercel.app/?username={USERNAME}&theme=radical&row=1&column=6" alt="GitHub trophies" />
+  <img src="https://github-profile-trophy.vercel.app/?username=$username&theme=radical&row=1&column=6" alt="GitHub trophies" />
 </div>
 
 <div align="center">
-  <img src="https://github-readme-activity-graph.vercel.app/graph?username={USERNAME}&theme=github" alt="GitHub Activity Graph" />
+  <img src="https://github-readme-activity-graph.vercel.app/graph?username=$username&theme=github" alt="GitHub Activity Graph" />
 </div>
 
 ---
@@ -478,9 +1371,9 @@ This is my automatically updated GitHub profile that shows my tech stack based o
 <summary>⚡ More Stats</summary>
 <br>
 
-![Profile Details](https://github-profile-summary-cards.vercel.app/api/cards/profile-details?username={USERNAME}&theme=monokai)
+![Profile Details](https://github-profile-summary-cards.vercel.app/api/cards/profile-details?username=$username&theme=monokai)
 
-![Streak Stats](https://github-readme-streak-stats.herokuapp.com/?user={USERNAME}&theme=dark)
+![Streak Stats](https://github-readme-streak-stats.herokuapp.com/?user=$username&theme=dark)
 
 </details>
 
@@ -489,29 +1382,613 @@ This is my automatically updated GitHub profile that shows my tech stack based o
 <div align="center">
   <img src="https://i.imgur.com/KXx0cCx.gif" width="600" height="4" alt="animated footer line">
   <br>
-  <img src="https://komarev.com/ghpvc/?username={USERNAME}&label=Profile+Views" alt="Profile views">
+  <img src="https://komarev.com/ghpvc/?username=$username&label=Profile+Views" alt="Profile views">
   <br>
-  <i>This profile README is automatically updated using GitHub Actions.<br>Last updated: {now.strftime("%Y-%m-%d")}</i>
+  <i>This profile README is automatically updated using GitHub Actions.<br>Last updated: $last_updated$partial_note</i>
 </div>
-"""
-    return readme
+""")
 
-def main():
-    """Main function to update the README"""
+# Footer note for runs that could not refresh every repository
+PARTIAL_NOTE = " (partial: some repositories could not be refreshed in this run)"
+
+# The footer date changes every day; it is ignored when comparing output
+LAST_UPDATED_PATTERN = re.compile(r"Last updated: [0-9-]+")
+
+def get_category_animation(categories):
+    """Get animated SVG header based on top project category"""
+    if not categories:
+        return HEADER_TEMPLATE.substitute(
+            lines="Welcome+to+my+GitHub+Profile;I'm+a+Developer;Passionate+about+coding;Creating+innovative+solutions"
+        )
+    
+    # Get top category
+    top_category = next(iter(categories)).replace(' ', '+')
+    
+    # Generate custom typing animation with category
+    return HEADER_TEMPLATE.substitute(
+        lines=f"Welcome+to+my+GitHub+Profile;I'm+a+{top_category}+Developer;Passionate+about+coding;Building+{top_category}+solutions"
+    )
+
+def render_focus_section(analysis):
+    """Render the project categories and common topics"""
+    categories = analysis.get("project_categories")
+    if not categories:
+        return ""
+    
+    parts = ["## 🚀 What I Work On\n\n", "My GitHub repositories focus on these areas:\n\n"]
+    # Add bullet points for each project category with count
+    parts.extend(f"- **{category}** ({count} repos)\n" for category, count in categories.items())
+    
+    # Add common topics/tags if available
+    if analysis.get("topics"):
+        parts.append("\n**Common topics:** ")
+        parts.extend(f"`#{topic}` " for topic in analysis["topics"])
+    
+    parts.append("\n")
+    return "".join(parts)
+
+def render_badge_section(title, names):
+    """Render a titled row of tool/framework badges, or nothing"""
+    if not names:
+        return ""
+    return f"\n\n### {title}\n\n" + "".join(f"{get_tool_badge(name)} " for name in names)
+
+def format_bytes(count):
+    """Format a byte count, e.g. 1.2 MB"""
+    for unit in ("B", "KB", "MB"):
+        if abs(count) < 1024:
+            return f"{count:.0f} {unit}" if unit == "B" or abs(count) >= 10 else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GB"
+
+def render_trends_section(trends):
+    """Render the changes since each trend period's baseline run, or nothing
+    
+    Omitted until the history reaches back at least one period.
+    """
+    if not trends or not any(trends["baselines"].values()):
+        return ""
+    current = trends["current"]
+    baselines = trends["baselines"]
+    
+    def row(label, value, delta, fmt=str):
+        cells = [label, fmt(value)]
+        for baseline in baselines.values():
+            change = delta(baseline) if baseline else None
+            if change is None:
+                cells.append("–")
+            else:
+                cells.append(("+" if change > 0 else "") + fmt(change) if change else "0")
+        return "| " + " | ".join(cells) + " |\n"
+    
+    parts = [
+        "\n### 📈 Trends\n\n",
+        "| | Now | " + " | ".join(f"{label} ago" for label in baselines) + " |\n",
+        "|---|---:|" + "---:|" * len(baselines) + "\n",
+    ]
+    for key, label in (
+        ("total_repos", "🔭 Repositories"), ("total_stars", "⭐ Stars"),
+        ("total_forks", "🍴 Forks"), ("followers", "👥 Followers")
+    ):
+        parts.append(row(label, current[key], lambda baseline: current[key] - baseline[key], lambda n: f"{n:,}"))
+    # Languages outside a baseline's top list have no recorded size there
+    for language, count in list(current["languages"].items())[:TREND_LANGUAGES]:
+        parts.append(row(
+            language, count,
+            lambda baseline: count - baseline["languages"][language] if language in baseline["languages"] else None,
+            format_bytes
+        ))
+    return "".join(parts)
+
+def generate_readme(analysis, stats, username=None, trends=None):
+    """Generate the README.md content"""
+    username = username or get_context().username
+    
+    return README_TEMPLATE.substitute(
+        header=get_category_animation(analysis.get("project_categories", {})),
+        username=username,
+        focus_section=render_focus_section(analysis),
+        language_badges="".join(f"{get_language_badge(lang)} " for lang, bytes_count in analysis["languages"]),
+        frameworks_section=render_badge_section("Frameworks & Libraries", analysis["frameworks"]),
+        tools_section=render_badge_section("Tools & Technologies", analysis["tools"]),
+        trends_section=render_trends_section(trends),
+        total_repos=analysis["stats"]["total_repos"],
+        total_stars=analysis["stats"]["total_stars"],
+        total_forks=analysis["stats"]["total_forks"],
+        followers=stats["followers"],
+        last_updated=datetime.now().strftime("%Y-%m-%d"),
+        partial_note=PARTIAL_NOTE if analysis.get("partial") else ""
+    )
+
+def content_hash(content):
+    """Hash README content, ignoring the volatile "Last updated" date"""
+    stable = LAST_UPDATED_PATTERN.sub("Last updated:", content)
+    return hashlib.sha256(stable.encode("utf-8")).hexdigest()
+
+def write_if_changed(path, content):
+    """Write content unless the file already holds the same README"""
+    try:
+        with open(path, "r") as f:
+            if content_hash(f.read()) == content_hash(content):
+                return False
+    except OSError:
+        pass
+    
+    with open(path, "w") as f:
+        f.write(content)
+    return True
+
+def format_snapshot(value, indent=""):
+    """Format JSON with one value per line and sorted keys, so snapshots diff cleanly
+    
+    Pairs such as (language, bytes) stay on one line.
+    """
+    if isinstance(value, dict) and value:
+        inner = indent + " "
+        items = [f"{inner}{json.dumps(key)}: {format_snapshot(value[key], inner)}" for key in sorted(value)]
+        return "{\n" + ",\n".join(items) + f"\n{indent}}}"
+    if isinstance(value, list) and value:
+        inner = indent + " "
+        items = [inner + (format_snapshot(item, inner) if isinstance(item, dict) else json.dumps(item)) for item in value]
+        return "[\n" + ",\n".join(items) + f"\n{indent}]"
+    return json.dumps(value)
+
+def make_snapshot(username, analysis, stats):
+    """Bundle a user's analysis and stats into a snapshot"""
+    return {
+        "version": SNAPSHOT_VERSION,
+        "username": username,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        # Ranked dicts are stored as pairs: JSON objects lose their order
+        "analysis": dict(
+            analysis,
+            languages=[list(pair) for pair in analysis["languages"]],
+            project_categories=[list(pair) for pair in analysis.get("project_categories", {}).items()]
+        ),
+        "stats": stats
+    }
+
+def write_snapshot(path, snapshot):
+    """Write a snapshot atomically"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(format_snapshot(snapshot) + "\n")
+    os.replace(tmp_path, path)
+
+def load_snapshot(path):
+    """Load a snapshot written by --fetch, restoring the analysis dict"""
+    with open(path, "r") as f:
+        snapshot = json.load(f)
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise SystemExit(f"{path}: unsupported snapshot version {snapshot.get('version')}")
+    analysis = snapshot["analysis"]
+    analysis["languages"] = [tuple(pair) for pair in analysis["languages"]]
+    analysis["project_categories"] = dict(analysis["project_categories"])
+    return snapshot
+
+def flatten_snapshot(value, prefix=""):
+    """Map every value of a snapshot to a dotted path
+    
+    Pairs are keyed by their name (analysis.languages.Python) and other
+    lists become sets, so a diff compares names rather than positions.
+    """
+    flat = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flat.update(flatten_snapshot(item, f"{prefix}{key}."))
+    elif isinstance(value, list) and value and all(isinstance(item, (list, tuple)) and len(item) == 2 for item in value):
+        for name, count in value:
+            flat[f"{prefix}{name}"] = count
+    elif isinstance(value, list):
+        flat[prefix[:-1]] = set(value)
+    else:
+        flat[prefix[:-1]] = value
+    return flat
+
+def diff_snapshots(old, new):
+    """Describe which values moved between two snapshots, one line each"""
+    def fmt(value):
+        return "(none)" if value is None else json.dumps(value)
+    
+    before = flatten_snapshot(old)
+    after = flatten_snapshot(new)
+    lines = []
+    for path in sorted(set(before) | set(after)):
+        if path in ("version", "created_at"):
+            continue
+        old_value = before.get(path)
+        new_value = after.get(path)
+        if old_value == new_value:
+            continue
+        if isinstance(old_value, set) or isinstance(new_value, set):
+            old_value = old_value or set()
+            new_value = new_value or set()
+            changes = [f"+{name}" for name in sorted(new_value - old_value)]
+            changes += [f"-{name}" for name in sorted(old_value - new_value)]
+            if changes:
+                lines.append(f"{path}: {', '.join(changes)}")
+        elif (
+            isinstance(old_value, (int, float)) and isinstance(new_value, (int, float))
+            and not isinstance(old_value, bool) and not isinstance(new_value, bool)
+        ):
+            lines.append(f"{path}: {old_value} -> {new_value} ({new_value - old_value:+})")
+        else:
+            lines.append(f"{path}: {fmt(old_value)} -> {fmt(new_value)}")
+    return lines
+
+def fetch_profile(username, analysis=None):
+    """Run the API phases for one user: repository analysis and contribution stats
+    
+    A precomputed analysis (e.g. merged from shards) skips the analysis step.
+    Every real fetch is appended to the run history. Returns (analysis, stats).
+    """
+    ctx = get_context()
+    metrics = ctx.metrics
+    
     # Get repository analysis
-    analysis = analyze_repositories()
+    if analysis is None:
+        with metrics.phase("analyze_repositories", user=username):
+            analysis = analyze_repositories(username)
     
     # Get contribution stats
-    stats = get_contribution_stats()
+    with metrics.phase("contribution_stats", user=username):
+        stats = get_contribution_stats(username)
+    
+    # Sample data would distort the trends
+    if not ctx.test_mode and ctx.history is not None:
+        with metrics.phase("record_history", user=username):
+            ctx.history.record(username, analysis, stats)
+    return analysis, stats
+
+def update_profile(username, output_path, analysis=None, stats=None, as_of=None):
+    """Analyze one user and write their README to output_path
+    
+    A precomputed analysis (e.g. merged from shards) skips the analysis
+    step; with stats as well (e.g. from a snapshot) no API calls are made.
+    Trends compare the numbers with the run history as of as_of (a
+    timestamp, default now).
+    """
+    ctx = get_context()
+    metrics = ctx.metrics
+    sample = False
+    if stats is None:
+        analysis, stats = fetch_profile(username, analysis)
+        sample = ctx.test_mode
+    
+    # Trends come from the local history only, never from the API
+    trends = None
+    if not sample and ctx.history is not None:
+        with metrics.phase("trends", user=username):
+            trends = ctx.history.trends(username, analysis, stats, TREND_PERIODS, as_of)
     
     # Generate README content
-    readme_content = generate_readme(analysis, stats)
+    with metrics.phase("render", user=username):
+        readme_content = generate_readme(analysis, stats, username, trends)
+    
+    # Skip the write (and the workflow's commit) when only the date moved
+    with metrics.phase("write", user=username):
+        changed = write_if_changed(output_path, readme_content)
+    if changed:
+        print(f"{output_path} updated successfully for {username}")
+    else:
+        print(f"{output_path} unchanged for {username}, skipping write")
+
+def get_org_members(org):
+    """List the logins of an organization's members"""
+    ctx = get_context()
+    if ctx.test_mode:
+        raise SystemExit("Listing organization members requires GITHUB_TOKEN")
+    return [member.login for member in ctx.github.get_organization(org).get_members()]
+
+def run_batch(usernames, output_dir):
+    """Generate one profile per user, sharing the session, cache and budget"""
+    os.makedirs(output_dir, exist_ok=True)
+    
+    def process(username):
+        try:
+            update_profile(username, os.path.join(output_dir, f"{username}.md"))
+            return True
+        except Exception as e:
+            # One failing user should not abort the rest of the batch
+            print(f"Error generating profile for {username}: {e}")
+            return False
+    
+    with ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY) as executor:
+        results = list(executor.map(process, usernames))
+    
+    print(f"Generated {sum(results)} of {len(usernames)} profiles in {output_dir}")
+
+class ProfileDaemon:
+    """Keeps one user's README current from GitHub webhook events
+    
+    Starts with a full run, then holds the per-repository records in
+    memory. Events only note which repositories changed (star and fork
+    events carry the new counts, which are applied on the spot); once the
+    events pause, each changed repository is re-analyzed once, the
+    analysis is re-aggregated from the records without further repository
+    requests, and the README is rendered.
+    """
+    
+    def __init__(self, username, output_path):
+        self.username = username
+        self.output_path = output_path
+        self.lock = threading.Lock()
+        self.entries = {}
+        # id -> full name of repositories to re-analyze
+        self.changed = {}
+        # ids of repositories deleted, made private or transferred away
+        self.removed = set()
+        # ids whose refresh failed; their records are stale until it succeeds
+        self.stale = set()
+        self.full_refresh = False
+        self.debouncer = None
+    
+    def start(self):
+        """Catch up with a full run, then start debouncing events"""
+        from webhook import Debouncer
+        self.refresh(full=True)
+        self.debouncer = Debouncer(self.refresh, WEBHOOK_DEBOUNCE, WEBHOOK_MAX_DELAY)
+    
+    def stop(self):
+        """Render any pending changes and persist the caches"""
+        if self.debouncer is not None:
+            self.debouncer.stop()
+    
+    def handle_event(self, event, payload):
+        """Record what a webhook event changed; returns whether it was relevant
+    
+        Runs on the HTTP server's threads, so it makes no API calls.
+        """
+        repository = payload.get("repository") or {}
+        repo_id = str(repository.get("id"))
+        owner = (repository.get("owner") or {}).get("login") or ""
+        with self.lock:
+            known = repo_id in self.entries
+        # Repositories transferred away no longer name us as the owner
+        if owner.lower() != self.username.lower() and not (event == "repository" and known):
+            return False
+    
+        if event in ("star", "fork"):
+            # Only the counts move; the payload carries both
+            if not known:
+                return False
+            with self.lock:
+                entry = self.entries[repo_id]
+                entry["record"] = dict(
+                    entry["record"],
+                    stars=repository.get("stargazers_count", entry["record"]["stars"]),
+                    forks=repository.get("forks_count", entry["record"]["forks"])
+                )
+        elif event == "push":
+            # Languages, README and manifests are read from the default branch
+            if payload.get("ref") != f"refs/heads/{repository.get('default_branch')}":
+                return False
+            if not self._mark_changed(repository, known):
+                return False
+        elif event == "public":
+            if not self._mark_changed(repository, known):
+                return False
+        elif event == "repository":
+            if payload.get("action") in ("deleted", "privatized"):
+                if not known:
+                    return False
+                with self.lock:
+                    self.removed.add(repo_id)
+                    self.changed.pop(repo_id, None)
+            elif not self._mark_changed(repository, known):
+                return False
+        else:
+            return False
     
-    # Write to README.md
-    with open("README.md", "w") as f:
-        f.write(readme_content)
+        get_context().metrics.count("webhook_events")
+        self.debouncer.trigger()
+        return True
+    
+    def _mark_changed(self, repository, known):
+        """Queue a repository for re-analysis; the API decides if it still counts"""
+        # Forks are never analyzed, unless one was stored before it became a fork
+        if not repository.get("full_name") or (repository.get("fork") and not known):
+            return False
+        repo_id = str(repository["id"])
+        with self.lock:
+            self.changed[repo_id] = repository["full_name"]
+            self.removed.discard(repo_id)
+        return True
+    
+    def _refresh_repo(self, repo_id, full_name):
+        """Re-analyze one repository, or drop it if it no longer belongs in the profile"""
+        from github import GithubException
+    
+        ctx = get_context()
+        try:
+            repo = ctx.github.get_repo(full_name)
+        except GithubException as e:
+            if e.status != 404:
+                raise
+            repo = None
+        if (
+            repo is None or repo.fork or repo.private or repo.name in EXCLUDE_REPOS
+            or repo.owner.login.lower() != self.username.lower()
+        ):
+            return None
+        stamp = repo_stamp(repo.pushed_at, repo.updated_at)
+        with self.lock:
+            stack = previous_stack(self.entries, repo.id)
+        return {"stamp": stamp, "record": analyze_repo(repo, stack)}
+    
+    def refresh(self, full=False):
+        """Apply the pending changes and re-render the README
+    
+        Runs on the debouncer's thread (or the caller's, for the first run),
+        never concurrently with itself.
+        """
+        ctx = get_context()
+        with self.lock:
+            changed, self.changed = self.changed, {}
+            removed, self.removed = self.removed, set()
+            full = full or self.full_refresh
+            self.full_refresh = False
+    
+        with ctx.metrics.phase("webhook_refresh", user=self.username):
+            if full:
+                # Unchanged repositories are reused from the store, so this
+                # also catches up on events missed while the daemon was down
+                incomplete = analyze_partial(self.username)["incomplete"]
+                with self.lock:
+                    self.entries = load_repo_store(self.username)
+                    self.stale = set()
+                # A run that could not refresh everything is retried after
+                # the next event
+                self.full_refresh = incomplete
+            else:
+                for repo_id, full_name in changed.items():
+                    try:
+                        entry = self._refresh_repo(repo_id, full_name)
+                    except Exception as e:
+                        # The stored record stands in until a later event or run
+                        print(f"Error refreshing repo {full_name}: {e}")
+                        ctx.metrics.count("repos_failed")
+                        with self.lock:
+                            self.stale.add(repo_id)
+                        continue
+                    with self.lock:
+                        self.stale.discard(repo_id)
+                        if entry is None:
+                            removed.add(repo_id)
+                        else:
+                            self.entries[repo_id] = entry
+                            ctx.metrics.count("repos_analyzed")
+                with self.lock:
+                    for repo_id in removed:
+                        self.entries.pop(repo_id, None)
+                        self.stale.discard(repo_id)
+                    entries = dict(self.entries)
+                    incomplete = bool(self.stale)
+                save_repo_store(self.username, entries)
+    
+            with self.lock:
+                records = [entry["record"] for entry in self.entries.values()]
+            update_profile(self.username, self.output_path, finalize_partial(partial_from_records(records, incomplete)))
+        ctx.finish(os.path.dirname(os.path.abspath(self.output_path)))
+
+def serve(username, output_path):
+    """Run the webhook daemon until interrupted (Ctrl+C or SIGTERM)"""
+    import signal
+    from webhook import WebhookServer
+    
+    ctx = get_context()
+    if ctx.test_mode:
+        raise SystemExit("--serve requires GITHUB_TOKEN")
+    if not WEBHOOK_SECRET:
+        raise SystemExit("--serve requires WEBHOOK_SECRET to verify webhook signatures")
+    
+    daemon = ProfileDaemon(username, output_path)
+    daemon.start()
+    server = WebhookServer(WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_SECRET, daemon.handle_event)
+    # Stop as cleanly on SIGTERM (service managers, containers) as on Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f"Listening for GitHub webhooks on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down")
+    finally:
+        server.shutdown()
+        daemon.stop()
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Generate GitHub profile READMEs")
+    parser.add_argument("--users", help="comma-separated usernames to generate profiles for")
+    parser.add_argument("--org", help="generate profiles for every member of this organization")
+    parser.add_argument("--output-dir", default="profiles", help="directory for batch output (one <username>.md per user)")
+    parser.add_argument("--processes", type=int, default=1, help="analyze the repositories in this many worker processes")
+    parser.add_argument("--shard", help="only analyze shard INDEX/COUNT (e.g. 0/4) and write its partial result")
+    parser.add_argument("--partial-out", help="where --shard writes its partial result (default partial-shard-INDEX-of-COUNT.json)")
+    parser.add_argument("--reduce", nargs="+", metavar="PARTIAL", help="merge shard partial results and write README.md")
+    parser.add_argument("--serve", action="store_true", help="keep README.md current from GitHub webhook events")
+    parser.add_argument("--fetch", metavar="SNAPSHOT", help="only fetch the analysis and stats and write them to a snapshot")
+    parser.add_argument("--render", metavar="SNAPSHOT", help="only render README.md from a snapshot, without API calls")
+    parser.add_argument("--diff", nargs=2, metavar=("OLD", "NEW"), help="show which values moved between two snapshots")
+    args = parser.parse_args()
+    
+    if args.shard:
+        try:
+            index, count = (int(part) for part in args.shard.split("/"))
+        except ValueError:
+            parser.error("--shard must look like INDEX/COUNT, e.g. 0/4")
+        if not 0 <= index < count:
+            parser.error("--shard INDEX must be between 0 and COUNT - 1")
+        args.shard = (index, count)
+    return args
+
+def main():
+    """Main function to update the README"""
+    args = parse_args()
     
-    print(f"README.md updated successfully for {USERNAME}")
+    if args.users or args.org:
+        usernames = [name.strip() for name in (args.users or "").split(",") if name.strip()]
+        if args.org:
+            usernames += get_org_members(args.org)
+        # Keep the first occurrence of each user
+        usernames = list(dict.fromkeys(usernames))
+        run_batch(usernames, args.output_dir)
+        get_context().finish(args.output_dir)
+    elif args.shard:
+        # Map step of a CI job matrix: one job per shard
+        set_context(Context(shard=args.shard))
+        ctx = get_context()
+        if ctx.test_mode:
+            raise SystemExit("Sharded analysis requires GITHUB_TOKEN")
+        partial_path = args.partial_out or f"partial-{shard_label(args.shard)}.json"
+        write_partial(partial_path, ctx.username, args.shard, analyze_partial())
+        print(f"Partial result for {shard_label(args.shard)} written to {partial_path}")
+        ctx.finish(".")
+    elif args.reduce:
+        # Reduce step: render from the merged shards without calling the API
+        # for repositories. User statistics still come from the API, and
+        # sample ones would be published next to real repository numbers
+        if get_context().test_mode:
+            raise SystemExit("Reducing shard results requires GITHUB_TOKEN")
+        username, partial = load_partials(args.reduce)
+        update_profile(username, "README.md", finalize_partial(partial))
+        get_context().finish(".")
+    elif args.diff:
+        old, new = (load_snapshot(path) for path in args.diff)
+        print("\n".join(diff_snapshots(old, new)) or "No changes")
+    elif args.render:
+        # Layout and badge changes are checked without touching the API
+        snapshot = load_snapshot(args.render)
+        update_profile(
+            snapshot["username"], "README.md", snapshot["analysis"], snapshot["stats"], snapshot["created_at"]
+        )
+        get_context().finish(".")
+    elif args.fetch:
+        ctx = get_context()
+        analysis = None
+        if args.processes > 1:
+            if ctx.test_mode:
+                raise SystemExit("Sharded analysis requires GITHUB_TOKEN")
+            with ctx.metrics.phase("analyze_repositories", user=ctx.username):
+                analysis = analyze_sharded(ctx.username, args.processes)
+        analysis, stats = fetch_profile(ctx.username, analysis)
+        write_snapshot(args.fetch, make_snapshot(ctx.username, analysis, stats))
+        print(f"Snapshot written to {args.fetch}")
+        ctx.finish(".")
+    elif args.serve:
+        # Long-running mode: re-analyze only what webhook events report
+        serve(get_context().username, "README.md")
+    elif args.processes > 1:
+        ctx = get_context()
+        if ctx.test_mode:
+            raise SystemExit("Sharded analysis requires GITHUB_TOKEN")
+        with ctx.metrics.phase("analyze_repositories", user=ctx.username):
+            analysis = analyze_sharded(ctx.username, args.processes)
+        update_profile(ctx.username, "README.md", analysis)
+        ctx.finish(".")
+    else:
+        update_profile(get_context().username, "README.md")
+        get_context().finish(".")
 
 if __name__ == "__main__":
     main()
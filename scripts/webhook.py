@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+GitHub webhook receiver
+
+A small HTTP server for GitHub webhook deliveries. Each POST is checked
+against its X-Hub-Signature-256 HMAC before the payload is even parsed,
+then handed to a callback together with its X-GitHub-Event name. The
+callback only records what changed; a Debouncer runs the expensive work
+once the deliveries stop for a moment, so a burst of events (a push of
+many commits, a batch of stars) coalesces into one update.
+
+Recorded payloads can be replayed against a running server, signed with
+WEBHOOK_SECRET:
+
+    python scripts/webhook.py http://127.0.0.1:8080/ push payload.json
+"""
+import os
+import sys
+import hmac
+import json
+import time
+import uuid
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# GitHub caps payloads at 25 MB; anything larger is not a GitHub delivery
+MAX_PAYLOAD_BYTES = 25 * 1024 * 1024
+
+def sign(secret, body):
+    """Compute the X-Hub-Signature-256 header value for a payload"""
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+def verify_signature(secret, body, signature):
+    """Check a delivery's X-Hub-Signature-256 header in constant time"""
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(sign(secret, body), signature)
+
+class Debouncer:
+    """Run a function once triggers have been quiet for delay seconds
+
+    A steady stream of triggers would postpone the run forever, so it also
+    runs max_delay seconds after the first trigger it has not served yet.
+    Runs happen on a single background thread, never concurrently; triggers
+    that arrive during a run schedule the next one.
+    """
+
+    def __init__(self, function, delay, max_delay):
+        self.function = function
+        self.delay = delay
+        self.max_delay = max_delay
+        self.condition = threading.Condition()
+        # Monotonic times of the first and last pending trigger
+        self.first = None
+        self.last = None
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def trigger(self):
+        """Schedule a run"""
+        with self.condition:
+            now = time.monotonic()
+            if self.first is None:
+                self.first = now
+            self.last = now
+            self.condition.notify()
+
+    def _due(self):
+        """Seconds until the pending run is due, or None if none is pending"""
+        if self.first is None:
+            return None
+        due = min(self.last + self.delay, self.first + self.max_delay)
+        return max(0.0, due - time.monotonic())
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.stopped:
+                    remaining = self._due()
+                    if remaining == 0:
+                        break
+                    self.condition.wait(remaining)
+                if self.stopped:
+                    return
+                self.first = self.last = None
+            try:
+                self.function()
+            except Exception as e:
+                # The next trigger tries again
+                print(f"Error in debounced update: {e}")
+
+    def stop(self, flush=True):
+        """Stop the thread, running a pending update first if flush"""
+        with self.condition:
+            pending = self.first is not None
+            self.stopped = True
+            self.condition.notify()
+        self.thread.join()
+        if flush and pending:
+            self.function()
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Request handler; the server subclass sets secret and on_event"""
+
+    secret = None
+    on_event = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, message):
+        body = json.dumps({"message": message}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        # Liveness check for whatever supervises the daemon
+        self._reply(200, "ok")
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self._reply(411, "Content-Length required")
+            return
+        # read(-1) would block until the client hangs up
+        if length < 0:
+            self._reply(400, "Invalid Content-Length")
+            return
+        if length > MAX_PAYLOAD_BYTES:
+            self._reply(413, "Payload too large")
+            return
+        body = self.rfile.read(length)
+
+        # Unsigned or forged deliveries are rejected before parsing
+        if not verify_signature(self.secret, body, self.headers.get("X-Hub-Signature-256")):
+            self._reply(401, "Invalid signature")
+            return
+
+        event = self.headers.get("X-GitHub-Event", "")
+        delivery = self.headers.get("X-GitHub-Delivery", "")
+        if event == "ping":
+            self._reply(200, "pong")
+            return
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self._reply(400, "Payload is not JSON")
+            return
+
+        # GitHub waits at most 10 seconds for an answer, so the callback
+        # must only record the event; the work happens after the debounce
+        try:
+            accepted = type(self).on_event(event, payload)
+        except Exception as e:
+            print(f"Error handling {event} delivery {delivery}: {e}")
+            self._reply(500, "Error handling event")
+            return
+        print(f"{'Accepted' if accepted else 'Ignored'} {event} delivery {delivery}")
+        self._reply(202 if accepted else 200, "accepted" if accepted else "ignored")
+
+class WebhookServer:
+    """HTTP server that verifies deliveries and passes them to on_event
+
+    on_event(event, payload) is called on the request's thread and returns
+    whether the event was relevant.
+    """
+
+    def __init__(self, host, port, secret, on_event):
+        if not secret:
+            raise ValueError("A webhook secret is required to verify deliveries")
+        # A subclass per server so several can run side by side
+        handler = type("Handler", (WebhookHandler,), {"secret": secret, "on_event": staticmethod(on_event)})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def send(url, event, payload_path, secret):
+    """Post a recorded payload to a webhook server, signed like GitHub does"""
+    from urllib.request import Request, urlopen
+    from urllib.error import HTTPError
+
+    with open(payload_path, "rb") as f:
+        body = f.read()
+    request = Request(url, data=body, method="POST", headers={
+        "Content-Type": "application/json",
+        "X-GitHub-Event": event,
+        "X-GitHub-Delivery": str(uuid.uuid4()),
+        "X-Hub-Signature-256": sign(secret, body),
+    })
+    try:
+        with urlopen(request) as response:
+            return response.status, response.read().decode("utf-8")
+    except HTTPError as e:
+        return e.code, e.read().decode("utf-8")
+
+def main():
+    if len(sys.argv) != 4:
+        raise SystemExit("Usage: webhook.py URL EVENT PAYLOAD.json")
+    secret = os.getenv("WEBHOOK_SECRET", "")
+    if not secret:
+        raise SystemExit("WEBHOOK_SECRET must be set to sign the payload")
+    status, body = send(sys.argv[1], sys.argv[2], sys.argv[3], secret)
+    print(status, body)
+
+if __name__ == "__main__":
+    main()
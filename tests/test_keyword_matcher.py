@@ -0,0 +1,73 @@
+"""
+Chunked keyword scans against whole-text scans
+
+KeywordScanner keeps only a short tail of the text between chunks, so a
+keyword or phrase split across chunks must still be found exactly once
+and counted in the right region. These tests cut generated READMEs at
+random points and compare the result with scanning the whole text.
+"""
+import os
+import sys
+import random
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from keyword_matcher import KeywordMatcher
+from update_readme import get_keyword_matcher
+
+# Near misses and separators around the real keywords
+FILLER = ["the", "maintain", "happy", "nodes", "reactive", "a", "web", "-", ".", ",", "\n", "/", "_", "é", "Ünïcode"]
+
+def random_text(rng, matcher, words):
+    """Text mixing keywords (any case, some plural) with filler"""
+    vocabulary = sorted(matcher.hits) + FILLER
+    parts = []
+    for _ in range(words):
+        word = rng.choice(vocabulary)
+        if rng.random() < 0.3:
+            word = word.upper() if rng.random() < 0.5 else word.title()
+        parts.append(word)
+        parts.append(rng.choice([" ", " ", "  ", "", "\n", ". "]))
+    return "".join(parts)
+
+def random_chunks(rng, text):
+    """Split text at random points, including empty and one-character chunks"""
+    cuts = sorted(rng.randint(0, len(text)) for _ in range(rng.randint(0, 40)))
+    bounds = [0] + cuts + [len(text)]
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+@pytest.mark.parametrize("seed", range(200))
+def test_chunked_scan_matches_whole_text(seed):
+    rng = random.Random(seed)
+    matcher = get_keyword_matcher()
+    description = random_text(rng, matcher, rng.randint(0, 8))
+    readme = random_text(rng, matcher, rng.randint(0, 300))
+    topics = [rng.choice(sorted(matcher.hits)) for _ in range(rng.randint(0, 4))]
+
+    whole = matcher.scan(description, readme, "repo", topics)
+    chunked = matcher.scan(description, iter(random_chunks(rng, readme)), "repo", topics)
+
+    assert chunked == whole
+
+def test_phrase_split_across_chunks():
+    matcher = get_keyword_matcher()
+    text = "built with react native and github actions"
+    whole = matcher.scan("", text, "repo", [])
+    for cut in range(len(text) + 1):
+        assert matcher.scan("", iter([text[:cut], text[cut:]]), "repo", []) == whole
+
+def test_tools_only_count_before_the_region_end():
+    matcher = KeywordMatcher({"web": ["react"]}, [("react", "frameworks"), ("docker", "tools")])
+    # The name and topics count for categories only
+    categories, tools, frameworks = matcher.scan("", iter(["plain ", "text"]), "react", ["docker"])
+    assert categories == ["web"]
+    assert tools == set()
+    assert frameworks == set()
+
+def test_keywords_split_inside_other_words_do_not_match():
+    matcher = KeywordMatcher({"AI": ["ai"], "Web": ["app"]}, [("node", "frameworks")])
+    # "ai" in "maintain", "app" in "happy" and "node" in "nodes", each cut
+    # where a chunk boundary would look like a word boundary
+    chunks = ["mainta", "in a h", "appy no", "de", "s list, ", "a", "i"]
+    assert matcher.scan("", iter(chunks), "", []) == (["AI"], set(), set())
@@ -0,0 +1,72 @@
+"""
+Shard partial results against a single-process analysis
+
+Repositories are split by shard_of, each shard folds its own records
+with partial_from_records, and merge_partials combines them. The merged
+result (and the rendered analysis) must not depend on the shard count or
+on the order the shards arrive in.
+"""
+import os
+import sys
+import random
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from update_readme import partial_from_records, merge_partials, finalize_partial, shard_of
+
+LANGUAGES = ["Python", "JavaScript", "Go", "Rust", "Shell", "HTML", "CSS", "C"]
+TOPICS = ["api", "cli", "bot", "game", "docker", "web-app", "iot"]
+CATEGORIES = ["Web Development", "Data Science", "DevOps", "Game Development", "Automation"]
+STACK = ["Docker", "React", "Django", "Flask", "PostgreSQL", "Redis", "AWS"]
+
+def random_records(rng, count):
+    """Records shaped like build_repo_record's, with ids to shard by"""
+    return [
+        {
+            "id": rng.randint(1, 10 ** 9),
+            "name": f"repo-{index}",
+            "stars": rng.randint(0, 500),
+            "forks": rng.randint(0, 50),
+            # Few distinct values, so counts tie and the tie-break matters
+            "languages": {lang: rng.choice([100, 200, 300]) for lang in rng.sample(LANGUAGES, rng.randint(0, 3))},
+            "topics": rng.sample(TOPICS, rng.randint(0, 3)),
+            "categories": rng.sample(CATEGORIES, rng.randint(0, 2)),
+            "tools": rng.sample(STACK, rng.randint(0, 2)),
+            "frameworks": rng.sample(STACK, rng.randint(0, 2)),
+        }
+        for index in range(count)
+    ]
+
+def shard_partials(records, count):
+    """Fold each shard's records on its own, as --shard I/N does"""
+    return [
+        partial_from_records([record for record in records if shard_of(record["id"], count) == index])
+        for index in range(count)
+    ]
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("count", [1, 2, 3, 7])
+def test_merged_shards_match_single_process(seed, count):
+    rng = random.Random(seed)
+    records = random_records(rng, rng.randint(0, 60))
+    whole = partial_from_records(records)
+
+    partials = shard_partials(records, count)
+    rng.shuffle(partials)
+    merged = merge_partials(partials)
+
+    assert merged == whole
+    assert finalize_partial(merged) == finalize_partial(whole)
+
+def test_more_shards_than_repositories():
+    records = random_records(random.Random(0), 2)
+    assert merge_partials(shard_partials(records, 8)) == partial_from_records(records)
+
+def test_one_incomplete_shard_marks_the_result_incomplete():
+    records = random_records(random.Random(1), 20)
+    partials = shard_partials(records, 3)
+    partials[1]["incomplete"] = True
+    merged = merge_partials(partials)
+    assert merged["incomplete"]
+    assert finalize_partial(merged)["partial"]
@@ -0,0 +1,186 @@
+"""
+RateLimitedAdapter against a local server that injects 403/429/502
+
+Each test scripts the responses the server gives, sends requests through a
+session mounted with the adapter, and checks what reached the server and
+what the scheduler did. Backoff sleeps are recorded instead of slept.
+"""
+import os
+import sys
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from rate_limit import RateLimitScheduler, RateLimitedAdapter
+
+class InjectingServer:
+    """Answers with scripted (status, headers, body) responses, then 200s"""
+
+    def __init__(self, delay=0.0, rate_limit=(5000, 5000)):
+        self.delay = delay
+        # (limit, remaining) sent in every response's rate limit headers
+        self.rate_limit = rate_limit
+        self.script = []
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                with server.lock:
+                    server.requests += 1
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                    status, headers, body = server.script.pop(0) if server.script else (200, {}, {"ok": True})
+                time.sleep(server.delay)
+                # Done before answering: once the client has the response it
+                # may send the next request before this thread gets to run
+                with server.lock:
+                    server.in_flight -= 1
+                limit, remaining = server.rate_limit
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.send_header("X-RateLimit-Limit", str(limit))
+                self.send_header("X-RateLimit-Remaining", str(remaining))
+                self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def server():
+    fake = InjectingServer()
+    yield fake
+    fake.stop()
+
+def make_session(scheduler):
+    """Session routed through the adapter, with sleeps recorded instead of slept"""
+    sleeps = []
+
+    sleep = scheduler.sleep
+
+    def record_sleep(seconds, retry=False):
+        sleeps.append(seconds)
+        sleep(0, retry)
+
+    scheduler.sleep = record_sleep
+    session = requests.Session()
+    adapter = RateLimitedAdapter(scheduler, pool_connections=1, pool_maxsize=8)
+    session.mount("http://", adapter)
+    return session, sleeps
+
+@pytest.mark.parametrize("status", [429, 502])
+def test_retries_rate_limits_and_server_errors(server, status):
+    scheduler = RateLimitScheduler(4)
+    session, sleeps = make_session(scheduler)
+    server.script = [(status, {}, {"message": "try again"})]
+
+    response = session.get(server.url)
+
+    assert response.status_code == 200
+    assert server.requests == 2
+    assert scheduler.stats["retries"] == 1
+    assert len(sleeps) == 1
+
+def test_gives_up_after_max_retries(server):
+    scheduler = RateLimitScheduler(4, max_retries=2)
+    session, sleeps = make_session(scheduler)
+    server.script = [(502, {}, {"message": "Server Error"})] * 5
+
+    response = session.get(server.url)
+
+    assert response.status_code == 502
+    assert server.requests == 3
+    assert len(sleeps) == 2
+
+def test_plain_403_is_returned_without_retry(server):
+    scheduler = RateLimitScheduler(4)
+    session, sleeps = make_session(scheduler)
+    server.script = [(403, {}, {"message": "Resource not accessible by integration"})]
+
+    response = session.get(server.url)
+
+    assert response.status_code == 403
+    assert server.requests == 1
+    assert sleeps == []
+
+def test_secondary_rate_limit_403_is_retried(server):
+    scheduler = RateLimitScheduler(4)
+    session, sleeps = make_session(scheduler)
+    server.script = [(403, {}, {"message": "You have exceeded a secondary rate limit."})]
+
+    response = session.get(server.url)
+
+    assert response.status_code == 200
+    assert server.requests == 2
+
+@pytest.mark.parametrize("status", [403, 429])
+def test_retry_after_is_honoured(server, status):
+    scheduler = RateLimitScheduler(4)
+    session, sleeps = make_session(scheduler)
+    server.script = [(status, {"Retry-After": "7"}, {"message": "slow down"})]
+
+    response = session.get(server.url)
+
+    assert response.status_code == 200
+    assert sleeps == [7.0]
+
+def test_retry_after_is_capped_by_max_wait(server):
+    scheduler = RateLimitScheduler(4, max_wait=3)
+    session, sleeps = make_session(scheduler)
+    server.script = [(429, {"Retry-After": "120"}, {"message": "slow down"})]
+
+    session.get(server.url)
+
+    assert sleeps == [3]
+
+def concurrency_reached(remaining):
+    """Most requests the server saw at once with a given remaining budget (of 100)"""
+    fake = InjectingServer(delay=0.1, rate_limit=(100, remaining))
+    try:
+        scheduler = RateLimitScheduler(4)
+        session, sleeps = make_session(scheduler)
+        # The first response tells the scheduler how much budget is left
+        session.get(fake.url)
+        fake.max_in_flight = 0
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: session.get(fake.url), range(8)))
+        return fake.max_in_flight
+    finally:
+        fake.stop()
+
+def test_concurrency_is_throttled_when_budget_is_low():
+    assert concurrency_reached(remaining=90) > 1
+    # Below 10% of the budget, one request at a time
+    assert concurrency_reached(remaining=5) == 1
+
+def test_allowed_concurrency_steps_down():
+    scheduler = RateLimitScheduler(8)
+    reset = time.time() + 3600
+    for remaining, allowed in [(100, 8), (20, 4), (5, 1)]:
+        scheduler.resources["core"] = {"limit": 100, "remaining": remaining, "reset": reset, "used": 0}
+        assert scheduler.allowed_concurrency() == allowed